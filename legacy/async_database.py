@@ -0,0 +1,181 @@
+"""
+Asyncio mirror of database.py.
+Every function has the same name and arguments as in database.py and runs the
+synchronous call on a bounded thread pool, so it works with any backend
+(Supabase or the local SQLite stand-in) and keeps the cache / write-behind
+behaviour of the sync facade, which app.py and its pages continue to use directly.
+
+Independent queries can be fanned out concurrently:
+
+    unlearned, everything = async_database.run(async_database.gather(
+        async_database.get_unlearned_phrases(user_id),
+        async_database.get_all_phrases(user_id),
+    ))
+"""
+#%%
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import database as db
+
+MAX_CONCURRENCY = 8
+
+# Shared by every event loop, so the limit holds even across asyncio.run() calls
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="async-db")
+
+#%%
+async def _call(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    # Executor threads don't inherit context variables: carry the caller's (e.g. the
+    # metrics page a query is attributed to) into the call
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, context.run, functools.partial(func, *args, **kwargs)
+    )
+
+async def gather(*aws, limit=MAX_CONCURRENCY):
+    """Like asyncio.gather, but with at most `limit` awaitables in flight"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws))
+
+def run(coro):
+    """Run a coroutine to completion from synchronous code (e.g. a Streamlit page)"""
+    return asyncio.run(coro)
+
+#%%
+async def create_user(username, password):
+    """Create a new user account"""
+    return await _call(db.create_user, username, password)
+
+async def authenticate_user(username, password):
+    """Authenticate user and return user_id if successful"""
+    return await _call(db.authenticate_user, username, password)
+
+#%%
+async def add_phrase(user_id, phrase, meaning, youtube_url, timestamp=0):
+    """Add a phrase for a specific user; False when the user already has it"""
+    return await _call(db.add_phrase, user_id, phrase, meaning, youtube_url, timestamp)
+
+async def get_unlearned_phrases(user_id):
+    """Get unlearned phrases for a specific user"""
+    return await _call(db.get_unlearned_phrases, user_id)
+
+async def get_all_phrases(user_id):
+    """Get all phrases for a specific user"""
+    return await _call(db.get_all_phrases, user_id)
+
+async def get_unlearned_phrases_page(user_id, cursor=None, page_size=db.PAGE_SIZE):
+    """Get one page of unlearned phrases, oldest first. Returns (DataFrame, next_cursor)."""
+    return await _call(db.get_unlearned_phrases_page, user_id, cursor, page_size)
+
+async def get_all_phrases_page(user_id, cursor=None, page_size=db.PAGE_SIZE):
+    """Get one page of all phrases, newest first. Returns (DataFrame, next_cursor)."""
+    return await _call(db.get_all_phrases_page, user_id, cursor, page_size)
+
+async def iter_unlearned_phrases(user_id, page_size=db.PAGE_SIZE):
+    """Yield unlearned phrases one page (DataFrame) at a time"""
+    async for df in _iter_pages(get_unlearned_phrases_page, user_id, page_size):
+        yield df
+
+async def iter_all_phrases(user_id, page_size=db.PAGE_SIZE):
+    """Yield all phrases one page (DataFrame) at a time"""
+    async for df in _iter_pages(get_all_phrases_page, user_id, page_size):
+        yield df
+
+async def _iter_pages(fetch_page, user_id, page_size):
+    cursor = None
+    while True:
+        df, cursor = await fetch_page(user_id, cursor, page_size)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            return
+
+async def search_phrases(user_id, query, cursor=None, page_size=db.PAGE_SIZE):
+    """Full-text search, best match first. Returns (DataFrame, next_cursor)."""
+    return await _call(db.search_phrases, user_id, query, cursor, page_size)
+
+#%%
+async def get_due_phrases(user_id, limit=db.PAGE_SIZE):
+    """Get the next `limit` unlearned phrases due for review, most overdue first"""
+    return await _call(db.get_due_phrases, user_id, limit)
+
+async def rate_phrase(phrase, user_id, quality):
+    """Record a review with SM-2 quality 0-5; returns the new schedule"""
+    return await _call(db.rate_phrase, phrase, user_id, quality)
+
+#%%
+async def get_videos(user_id):
+    """The user's YouTube videos with their phrase counts"""
+    return await _call(db.get_videos, user_id)
+
+async def get_video_phrases(user_id, video_id):
+    """All phrases clipped from one video, in timestamp order"""
+    return await _call(db.get_video_phrases, user_id, video_id)
+
+#%%
+async def find_near_duplicates(user_id, threshold=None):
+    """Near-duplicate phrases with a `group` column, largest group first"""
+    return await _call(db.find_near_duplicates, user_id, threshold)
+
+async def merge_phrases(keep_id, drop_ids, user_id):
+    """Fold near-duplicates into keep_id and delete drop_ids"""
+    await _call(db.merge_phrases, keep_id, drop_ids, user_id)
+
+#%%
+async def mark_as_learned(phrase_id, user_id):
+    """Mark a phrase as learned (with user verification)"""
+    await _call(db.mark_as_learned, phrase_id, user_id)
+
+async def queue_mark_as_learned(phrase_id, user_id):
+    """Mark a phrase as learned later, in a batch"""
+    await _call(db.queue_mark_as_learned, phrase_id, user_id)
+
+async def queue_delete_phrase(phrase_id, user_id):
+    """Delete a phrase later, in a batch"""
+    await _call(db.queue_delete_phrase, phrase_id, user_id)
+
+async def flush_writes(user_id):
+    """Apply this user's queued writes now"""
+    await _call(db.flush_writes, user_id)
+
+async def pending_write_count(user_id):
+    """Number of this user's queued writes not yet applied"""
+    return await _call(db.pending_write_count, user_id)
+
+async def import_phrases_from_df(user_id, df, progress=None, on_duplicate="skip"):
+    """Imports phrases from a pandas DataFrame for a specific user.
+    Returns an importer.ImportReport.
+    """
+    return await _call(db.import_phrases_from_df, user_id, df, progress, on_duplicate)
+
+async def clear_all_phrases(user_id):
+    """Deletes all phrases for a specific user (Use with caution)."""
+    await _call(db.clear_all_phrases, user_id)
+
+async def delete_phrase(phrase_id, user_id):
+    """Delete a phrase (with user verification)"""
+    await _call(db.delete_phrase, phrase_id, user_id)
+
+async def delete_phrases(phrase_ids, user_id):
+    """Delete several phrases in one backend call"""
+    await _call(db.delete_phrases, phrase_ids, user_id)
+
+async def reset_all_progress(user_id):
+    """Resets 'is_learned' to False for all phrases of a specific user."""
+    await _call(db.reset_all_progress, user_id)
+
+async def delete_learned_phrases(user_id):
+    """Deletes all phrases marked as learned for a specific user."""
+    await _call(db.delete_learned_phrases, user_id)
+
+#%%
+async def cache_stats():
+    """Return query cache hit/miss counters"""
+    return await _call(db.cache_stats)
@@ -0,0 +1,8 @@
+"""
+Password hashing shared by the storage backends
+"""
+import hashlib
+
+def hash_password(password):
+    """Hash password using SHA-256"""
+    return hashlib.sha256(password.encode()).hexdigest()
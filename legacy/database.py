@@ -1,161 +1,411 @@
+"""
+Storage facade used by app.py and its pages (views/).
+Every function delegates to the backend selected in .streamlit/secrets.toml:
+
+    [database]
+    backend = "sqlite"      # "supabase" (default) or "sqlite"
+    path = "phrases.db"     # sqlite only, optional
+
+    [cache]
+    enabled = true          # per-user read-through cache for phrase queries
+    ttl = 300               # seconds
+    max_entries = 256
+
+    [write_behind]
+    max_pending = 20        # flush once this many phrase ids are queued
+    max_delay = 5           # ... or this many seconds after the first one
+
+    [metrics]
+    enabled = false         # per-call timing, see metrics.py for all options
+
+Cached results are shared between reruns; treat returned DataFrames as read-only.
+"""
 #%%
+import importlib
+import threading
 import streamlit as st
-import pandas as pd
-import hashlib
-from supabase import create_client
+from query_cache import QueryCache
+from write_behind import WriteBehindQueue
+from metrics import InstrumentedBackend, Metrics
+from metrics import set_current_page  # noqa: F401 (re-exported for app.py's page tracking)
+import scheduler
+from normalize import normalize_text
+
+PAGE_SIZE = 50
+
+BACKENDS = {
+    "supabase": "supabase_backend",
+    "sqlite": "sqlite_backend",
+}
 
 #%%
 @st.cache_resource
-def get_supabase_client():
-    """Initialize and return Supabase client (cached)"""
-    url = st.secrets["supabase"]["url"]
-    key = st.secrets["supabase"]["key"]
-    return create_client(url, key)
+def get_backend():
+    """Import and return the configured backend module (cached)"""
+    config = st.secrets.get("database", {})
+    name = config.get("backend", "supabase")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown database backend: {name}")
+    backend = importlib.import_module(BACKENDS[name])
+    if name == "sqlite" and "path" in config:
+        backend.configure(config["path"])
+    metrics = get_metrics()
+    if metrics is not None:
+        backend = InstrumentedBackend(backend, metrics)
+    return backend
+
+@st.cache_resource
+def get_metrics():
+    """Return the process-wide Metrics collector (None unless [metrics] enabled = true)"""
+    config = st.secrets.get("metrics", {})
+    if not config.get("enabled", False):
+        return None
+    metrics = Metrics(
+        window=config.get("window", 1000),
+        slow_ms=config.get("slow_ms", 200),
+        slow_log=config.get("slow_log"),
+    )
+    if "prometheus_port" in config:
+        metrics.serve_prometheus(config["prometheus_port"])
+    return metrics
+
+def metrics_snapshot():
+    """Return per-operation timings (empty dict when metrics are disabled)"""
+    metrics = get_metrics()
+    return metrics.snapshot() if metrics is not None else {}
+
+@st.cache_resource
+def get_cache():
+    """Return the process-wide query cache (None when disabled)"""
+    config = st.secrets.get("cache", {})
+    if not config.get("enabled", True):
+        return None
+    return QueryCache(
+        max_entries=config.get("max_entries", 256),
+        ttl=config.get("ttl", 300),
+    )
+
+def _cached(user_id, key, loader):
+    cache = get_cache()
+    if cache is None:
+        return loader()
+    return cache.get_or_load(user_id, key, loader)
+
+def _invalidate(user_id):
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate_user(user_id)
+    _notify_change(user_id)
 
 #%%
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+_change_listeners = []
+
+def add_change_listener(callback):
+    """Call callback(user_id) after every write to that user's phrases"""
+    _change_listeners.append(callback)
+
+def _notify_change(user_id):
+    for callback in _change_listeners:
+        callback(user_id)
+
+def cache_stats():
+    """Return query cache hit/miss counters (empty dict when disabled)"""
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
+
+#%%
+@st.cache_resource
+def _write_queues():
+    """Process-wide {user_id: WriteBehindQueue} registry and its lock"""
+    return {}, threading.Lock()
+
+def _write_queue(user_id):
+    queues, lock = _write_queues()
+    with lock:
+        queue = queues.get(user_id)
+        if queue is None:
+            config = st.secrets.get("write_behind", {})
+            # Bind backend and cache now: the timer thread flushes outside a script run
+            backend, cache = get_backend(), get_cache()
+
+            def apply(op, ids):
+                if op == "learned":
+                    backend.mark_many_as_learned(ids, user_id)
+                else:
+                    backend.delete_phrases(ids, user_id)
+                if cache is not None:
+                    cache.invalidate_user(user_id)
+                _notify_change(user_id)
+
+            queue = WriteBehindQueue(
+                apply,
+                max_pending=config.get("max_pending", 20),
+                max_delay=config.get("max_delay", 5),
+            )
+            queues[user_id] = queue
+        return queue
+
+def queue_mark_as_learned(phrase_id, user_id):
+    """Mark a phrase as learned later, in a batch; reads reflect it immediately"""
+    _write_queue(user_id).enqueue("learned", phrase_id)
+
+def queue_delete_phrase(phrase_id, user_id):
+    """Delete a phrase later, in a batch; reads reflect it immediately"""
+    _write_queue(user_id).enqueue("delete", phrase_id)
+
+def flush_writes(user_id):
+    """Apply this user's queued writes now"""
+    queues, lock = _write_queues()
+    with lock:
+        queue = queues.get(user_id)
+    if queue is not None:
+        queue.flush()
+
+def pending_write_count(user_id):
+    """Number of this user's queued writes not yet applied"""
+    queues, lock = _write_queues()
+    with lock:
+        queue = queues.get(user_id)
+    if queue is None:
+        return 0
+    return sum(len(ids) for ids in queue.pending().values())
+
+def _overlay_pending(user_id, result, unlearned_only):
+    """Apply queued writes to a read result (DataFrame or (DataFrame, cursor))"""
+    queues, lock = _write_queues()
+    with lock:
+        queue = queues.get(user_id)
+    if queue is None:
+        return result
+    pending = queue.pending()
+    if not (pending["learned"] or pending["delete"]):
+        return result
+    df, rest = (result[0], result[1:]) if isinstance(result, tuple) else (result, None)
+    if not df.empty:
+        hidden = pending["delete"] | pending["learned"] if unlearned_only else pending["delete"]
+        df = df[~df["id"].isin(hidden)]
+        if not unlearned_only and pending["learned"]:
+            df = df.assign(is_learned=df["is_learned"] | df["id"].isin(pending["learned"]))
+    return df if rest is None else (df, *rest)
 
 #%%
 def create_user(username, password):
     """Create a new user account"""
-    supabase = get_supabase_client()
-    try:
-        password_hash = hash_password(password)
-        result = supabase.table("users").insert({
-            "username": username,
-            "password_hash": password_hash
-        }).execute()
-        return True, "Account created successfully!"
-    except Exception as e:
-        if "duplicate key" in str(e) or "unique" in str(e).lower():
-            return False, "Username already exists."
-        return False, f"Error: {e}"
+    return get_backend().create_user(username, password)
 
 #%%
 def authenticate_user(username, password):
     """Authenticate user and return user_id if successful"""
-    supabase = get_supabase_client()
-    password_hash = hash_password(password)
-    result = supabase.table("users").select("id").eq(
-        "username", username
-    ).eq(
-        "password_hash", password_hash
-    ).execute()
-    
-    if result.data:
-        return True, result.data[0]["id"]
-    else:
-        return False, None
+    return get_backend().authenticate_user(username, password)
 
 #%%
 def add_phrase(user_id, phrase, meaning, youtube_url, timestamp=0):
-    """Add a phrase for a specific user"""
-    supabase = get_supabase_client()
-    supabase.table("phrases").insert({
-        "user_id": user_id,
-        "phrase": phrase,
-        "meaning": meaning,
-        "youtube_url": youtube_url or "",
-        "timestamp": timestamp
-    }).execute()
+    """Add a phrase for a specific user (phrase and meaning are stored normalized).
+    Returns False when the user already has the phrase."""
+    flush_writes(user_id)
+    inserted = get_backend().add_phrase(user_id, normalize_text(phrase), normalize_text(meaning),
+                                        youtube_url, timestamp)
+    if inserted:
+        _invalidate(user_id)
+    return inserted
 
 #%%
 def get_unlearned_phrases(user_id):
     """Get unlearned phrases for a specific user"""
-    supabase = get_supabase_client()
-    result = supabase.table("phrases").select("*").eq(
-        "user_id", user_id
-    ).eq(
-        "is_learned", False
-    ).execute()
-    
-    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
-    return df
+    result = _cached(user_id, ("unlearned",),
+                     lambda: get_backend().get_unlearned_phrases(user_id))
+    return _overlay_pending(user_id, result, unlearned_only=True)
 
 #%%
 def get_all_phrases(user_id):
     """Get all phrases for a specific user"""
-    supabase = get_supabase_client()
-    result = supabase.table("phrases").select("*").eq(
-        "user_id", user_id
-    ).order(
-        "created_at", desc=True
-    ).execute()
-    
-    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
-    return df
+    result = _cached(user_id, ("all",),
+                     lambda: get_backend().get_all_phrases(user_id))
+    return _overlay_pending(user_id, result, unlearned_only=False)
+
+#%%
+def get_unlearned_phrases_page(user_id, cursor=None, page_size=PAGE_SIZE):
+    """Get one page of unlearned phrases, oldest first.
+    Returns (DataFrame, next_cursor); pass next_cursor back to get the following page.
+    """
+    result = _cached(user_id, ("unlearned_page", cursor, page_size),
+                     lambda: get_backend().get_unlearned_phrases_page(user_id, cursor, page_size))
+    return _overlay_pending(user_id, result, unlearned_only=True)
+
+#%%
+def get_all_phrases_page(user_id, cursor=None, page_size=PAGE_SIZE):
+    """Get one page of all phrases, newest first.
+    Returns (DataFrame, next_cursor); pass next_cursor back to get the following page.
+    """
+    result = _cached(user_id, ("all_page", cursor, page_size),
+                     lambda: get_backend().get_all_phrases_page(user_id, cursor, page_size))
+    return _overlay_pending(user_id, result, unlearned_only=False)
+
+#%%
+def iter_unlearned_phrases(user_id, page_size=PAGE_SIZE):
+    """Yield unlearned phrases one page (DataFrame) at a time"""
+    return _iter_pages(get_unlearned_phrases_page, user_id, page_size)
+
+#%%
+def iter_all_phrases(user_id, page_size=PAGE_SIZE):
+    """Yield all phrases one page (DataFrame) at a time"""
+    return _iter_pages(get_all_phrases_page, user_id, page_size)
+
+def _iter_pages(fetch_page, user_id, page_size):
+    cursor = None
+    while True:
+        df, cursor = fetch_page(user_id, cursor, page_size)
+        if not df.empty:
+            yield df
+        if cursor is None:
+            return
+
+#%%
+def search_phrases(user_id, query, cursor=None, page_size=PAGE_SIZE):
+    """Full-text search over English phrases and Japanese meanings, best match first.
+    Returns (DataFrame, next_cursor); pass next_cursor back to get the following page.
+    """
+    result = _cached(user_id, ("search", query, cursor, page_size),
+                     lambda: get_backend().search_phrases(user_id, query, cursor, page_size))
+    return _overlay_pending(user_id, result, unlearned_only=False)
+
+#%%
+def get_due_phrases(user_id, limit=PAGE_SIZE):
+    """Get the next `limit` unlearned phrases due for review (SM-2), most overdue first.
+    Cached like the other reads, so a card that falls due mid-session shows up after
+    the next write or once the cache TTL expires.
+    """
+    # Queued learned/delete ids are hidden from the result: fetch that many more rows so
+    # a full page still comes back full (callers read a short page as the end of the queue)
+    fetch = limit + pending_write_count(user_id)
+    result = _cached(user_id, ("due", fetch),
+                     lambda: get_backend().get_due_phrases(user_id, fetch))
+    return _overlay_pending(user_id, result, unlearned_only=True).head(limit)
+
+#%%
+def rate_phrase(phrase, user_id, quality):
+    """Record a review of phrase (a row from get_due_phrases) with SM-2 quality 0-5.
+    The next schedule is computed from the row itself, so this is a single write.
+    Returns the new schedule.
+    """
+    schedule = scheduler.next_schedule(phrase, quality)
+    flush_writes(user_id)
+    get_backend().update_schedule(phrase["id"], user_id, schedule)
+    _invalidate(user_id)
+    return schedule
+
+#%%
+def get_videos(user_id):
+    """The user's YouTube videos with their phrase counts, most recently added first"""
+    return _cached(user_id, ("videos",), lambda: get_backend().get_videos(user_id))
+
+def get_video_phrases(user_id, video_id):
+    """All phrases clipped from one video, in timestamp order"""
+    result = _cached(user_id, ("video", video_id),
+                     lambda: get_backend().get_video_phrases(user_id, video_id))
+    return _overlay_pending(user_id, result, unlearned_only=False)
+
+#%%
+def find_near_duplicates(user_id, threshold=None):
+    """Phrases whose text is nearly the same (MinHash/LSH, see near_duplicates.py).
+    threshold defaults to near_duplicates.DEFAULT_THRESHOLD.
+    Returns one DataFrame of the grouped phrases with a `group` column (0 = largest
+    group), ordered by group and then oldest first, and a `similarity` column: the
+    estimated similarity of each phrase to the oldest of its group (groups are chains
+    of near-matches, so a member can be far from it).
+    """
+    # Only this function needs numpy/pandas here; importing them on first use keeps
+    # the facade light for pages (like login) that never build a DataFrame
+    import numpy as np
+    import pandas as pd
+    import near_duplicates
+    threshold = near_duplicates.DEFAULT_THRESHOLD if threshold is None else threshold
+
+    def load():
+        df = get_backend().get_phrase_signatures(user_id)
+        if df.empty:
+            return df
+        sigs = near_duplicates.from_blobs(df["minhash"], df["phrase"])
+        groups = near_duplicates.group_duplicates(df["id"].to_numpy(), sigs, threshold)
+        if not groups:
+            return pd.DataFrame()
+        positions = pd.Series(np.arange(len(df)), index=df["id"].to_numpy())
+        df = df.drop(columns="minhash").set_index("id", drop=False).rename_axis(None)
+        members = df.loc[np.concatenate(groups)].assign(
+            group=np.repeat(np.arange(len(groups)), [len(ids) for ids in groups])
+        )
+        members = members.sort_values(["group", "created_at", "id"]).reset_index(drop=True)
+        rows = positions[members["id"]].to_numpy()
+        oldest = members.groupby("group")["id"].transform("first")
+        return members.assign(similarity=near_duplicates.similarities(
+            sigs, rows, positions[oldest].to_numpy()
+        ))
+
+    df = _overlay_pending(user_id, _cached(user_id, ("near_duplicates", threshold), load),
+                          unlearned_only=False)
+    if df.empty:
+        return df
+    # Deletes still queued may leave a group with a single phrase
+    return df[df.groupby("group")["id"].transform("size") > 1]
+
+def merge_phrases(keep_id, drop_ids, user_id):
+    """Fold near-duplicates into keep_id: it keeps the first video link among them and
+    counts as learned if any of them was; drop_ids are deleted."""
+    flush_writes(user_id)
+    get_backend().merge_phrases(keep_id, drop_ids, user_id)
+    _invalidate(user_id)
 
 #%%
 def mark_as_learned(phrase_id, user_id):
     """Mark a phrase as learned (with user verification)"""
-    supabase = get_supabase_client()
-    supabase.table("phrases").update(
-        {"is_learned": True}
-    ).eq(
-        "id", phrase_id
-    ).eq(
-        "user_id", user_id
-    ).execute()
+    flush_writes(user_id)
+    get_backend().mark_as_learned(phrase_id, user_id)
+    _invalidate(user_id)
 
 #%%
-def import_phrases_from_df(user_id, df):
+def import_phrases_from_df(user_id, df, progress=None, on_duplicate="skip"):
     """Imports phrases from a pandas DataFrame for a specific user.
     Expected columns: 'phrase', 'meaning'
+    progress, if given, is called as progress(rows_done, rows_total) after each chunk.
+    on_duplicate: "skip" leaves already-stored phrases alone, "merge" refreshes their
+    youtube_url/timestamp; is_learned is kept either way.
+    Returns an importer.ImportReport with inserted/skipped/failed counts.
     """
-    if 'phrase' not in df.columns or 'meaning' not in df.columns:
-        raise ValueError("CSV must contain 'phrase' and 'meaning' columns.")
-    
-    supabase = get_supabase_client()
-    
-    records = []
-    for _, row in df.iterrows():
-        record = {
-            "user_id": user_id,
-            "phrase": str(row["phrase"]) if pd.notna(row["phrase"]) else "",
-            "meaning": str(row["meaning"]) if pd.notna(row["meaning"]) else "",
-            "youtube_url": str(row.get("youtube_url", "")) if pd.notna(row.get("youtube_url", "")) else "",
-            "timestamp": int(row.get("timestamp", 0)) if pd.notna(row.get("timestamp", 0)) else 0,
-        }
-        records.append(record)
-    
-    # Supabase supports batch insert
-    if records:
-        supabase.table("phrases").insert(records).execute()
+    flush_writes(user_id)
+    report = get_backend().import_phrases_from_df(user_id, df, progress, on_duplicate)
+    _invalidate(user_id)
+    return report
 
 #%%
 def clear_all_phrases(user_id):
     """Deletes all phrases for a specific user (Use with caution)."""
-    supabase = get_supabase_client()
-    supabase.table("phrases").delete().eq("user_id", user_id).execute()
+    flush_writes(user_id)
+    get_backend().clear_all_phrases(user_id)
+    _invalidate(user_id)
 
 #%%
 def delete_phrase(phrase_id, user_id):
     """Delete a phrase (with user verification)"""
-    supabase = get_supabase_client()
-    supabase.table("phrases").delete().eq(
-        "id", phrase_id
-    ).eq(
-        "user_id", user_id
-    ).execute()
+    flush_writes(user_id)
+    get_backend().delete_phrase(phrase_id, user_id)
+    _invalidate(user_id)
+
+def delete_phrases(phrase_ids, user_id):
+    """Delete several phrases in one backend call"""
+    flush_writes(user_id)
+    get_backend().delete_phrases(phrase_ids, user_id)
+    _invalidate(user_id)
 
 #%%
 def reset_all_progress(user_id):
-    """Resets 'is_learned' to False for all phrases of a specific user."""
-    supabase = get_supabase_client()
-    supabase.table("phrases").update(
-        {"is_learned": False}
-    ).eq(
-        "user_id", user_id
-    ).execute()
+    """Resets 'is_learned' to False and the review schedule for all phrases of a specific user."""
+    flush_writes(user_id)
+    get_backend().reset_all_progress(user_id)
+    _invalidate(user_id)
 
 #%%
 def delete_learned_phrases(user_id):
     """Deletes all phrases marked as learned for a specific user."""
-    supabase = get_supabase_client()
-    supabase.table("phrases").delete().eq(
-        "is_learned", True
-    ).eq(
-        "user_id", user_id
-    ).execute()
+    flush_writes(user_id)
+    get_backend().delete_learned_phrases(user_id)
+    _invalidate(user_id)
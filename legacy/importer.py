@@ -0,0 +1,126 @@
+"""
+Bulk import pipeline shared by the storage backends.
+
+- columns are coerced once with vectorized fillna/astype instead of per-row iterrows
+- rows are sent in fixed-size chunks so large CSVs stay under request size limits
+- each chunk is retried a bounded number of times before its rows are reported as failed
+- an optional progress callback receives (rows_done, rows_total) after every chunk
+- every row carries a normalized content hash of (phrase, meaning); backends keep a
+  unique (user_id, content_hash) index and upsert, so re-importing a file is a no-op
+- every row also carries the phrase's MinHash signature for near_duplicates.py and its
+  canonical YouTube video id and deep link (youtube.py)
+"""
+#%%
+import hashlib
+import time
+from dataclasses import dataclass, field
+import pandas as pd
+import near_duplicates
+import youtube
+from normalize import KEY_PIPELINE, normalize_series
+
+CHUNK_SIZE = 500
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+
+IMPORT_COLUMNS = [
+    "phrase", "meaning", "youtube_url", "timestamp", "content_hash", "minhash",
+    "video_id", "video_link",
+]
+
+# What to do with rows whose content_hash already exists for the user
+ON_DUPLICATE = ("skip", "merge")  # merge: overwrite youtube_url/timestamp, keep is_learned
+
+#%%
+@dataclass
+class ImportReport:
+    """Outcome of an import: counts plus the source rows that could not be inserted"""
+    total: int = 0
+    inserted: int = 0
+    skipped: int = 0   # duplicates of existing rows or of earlier rows in the same file
+    failed: int = 0
+    failed_rows: list = field(default_factory=list)  # index labels of the input DataFrame
+    errors: list = field(default_factory=list)       # one message per failed chunk
+
+    @property
+    def ok(self):
+        return self.failed == 0
+
+#%%
+def content_hashes(phrase, meaning):
+    """Return a Series of content hashes for aligned phrase/meaning string Series
+    (keys normalized with normalize.KEY_PIPELINE: NFKC, casefold, collapsed whitespace)"""
+    keys = normalize_series(phrase, KEY_PIPELINE) + "\x1f" + normalize_series(meaning, KEY_PIPELINE)
+    return pd.Series(
+        [hashlib.sha1(k.encode("utf-8")).hexdigest() for k in keys],
+        index=phrase.index,
+    )
+
+def content_hash(phrase, meaning):
+    """Content hash for a single phrase/meaning pair (same result as content_hashes)"""
+    return content_hashes(pd.Series([phrase or ""]), pd.Series([meaning or ""])).iat[0]
+
+#%%
+def prepare_records(df):
+    """Return a DataFrame with exactly IMPORT_COLUMNS, coerced to str/str/str/int/str/bytes/str/str.
+    phrase and meaning are normalized (normalize.py) before hashing.
+    Rows repeating an earlier row's content within df are dropped.
+    Raises ValueError when 'phrase' or 'meaning' is missing.
+    """
+    if 'phrase' not in df.columns or 'meaning' not in df.columns:
+        raise ValueError("CSV must contain 'phrase' and 'meaning' columns.")
+
+    out = pd.DataFrame(index=df.index)
+    out["phrase"] = normalize_series(df["phrase"].fillna("").astype(str))
+    out["meaning"] = normalize_series(df["meaning"].fillna("").astype(str))
+    if "youtube_url" in df.columns:
+        out["youtube_url"] = df["youtube_url"].fillna("").astype(str)
+    else:
+        out["youtube_url"] = ""
+    if "timestamp" in df.columns:
+        out["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce").fillna(0).astype(int)
+    else:
+        out["timestamp"] = 0
+    out["content_hash"] = content_hashes(out["phrase"], out["meaning"])
+    out = out.drop_duplicates("content_hash")
+    out["minhash"] = near_duplicates.signature_blobs(out["phrase"])
+    out["video_id"] = youtube.video_ids(out["youtube_url"])
+    out["video_link"] = youtube.deep_links(out["youtube_url"], out["timestamp"], out["video_id"])
+    return out
+
+#%%
+def run_import(records, insert_chunk, chunk_size=CHUNK_SIZE, max_retries=MAX_RETRIES,
+               progress=None, total=None):
+    """Feed `records` (from prepare_records) to insert_chunk(DataFrame) chunk by chunk.
+    insert_chunk may return the number of rows it actually inserted (the rest count as skipped).
+    total is the size of the source DataFrame, so in-file duplicates are reported as skipped.
+    Returns an ImportReport; a chunk that still fails after max_retries is skipped.
+    """
+    report = ImportReport(total=len(records) if total is None else total)
+    report.skipped = report.total - len(records)
+    for start in range(0, len(records), chunk_size):
+        chunk = records.iloc[start:start + chunk_size]
+        error, inserted = _insert_with_retry(insert_chunk, chunk, max_retries)
+        if error is None:
+            inserted = len(chunk) if inserted is None else inserted
+            report.inserted += inserted
+            report.skipped += len(chunk) - inserted
+        else:
+            report.failed += len(chunk)
+            report.failed_rows.extend(chunk.index.tolist())
+            report.errors.append(f"rows {start}-{start + len(chunk) - 1}: {error}")
+        if progress is not None:
+            progress(start + len(chunk), len(records))
+    return report
+
+def _insert_with_retry(insert_chunk, chunk, max_retries):
+    """Return (None, inserted) on success, or (last exception, 0) after max_retries attempts"""
+    delay = RETRY_BACKOFF
+    for attempt in range(max_retries):
+        try:
+            return None, insert_chunk(chunk)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                return e, 0
+            time.sleep(delay)
+            delay *= 2
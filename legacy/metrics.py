@@ -0,0 +1,179 @@
+"""
+Query timing instrumentation for the storage backends.
+When enabled, database.py wraps the backend in InstrumentedBackend, which records
+per operation: wall time, rows returned, payload bytes and the app page that made
+the call. Disabled (the default), the raw backend is used and nothing is measured.
+
+    [metrics]
+    enabled = true
+    window = 1000                 # samples kept per operation for p50/p95/p99
+    slow_ms = 200                 # calls slower than this go to the slow-query log
+    slow_log = "slow_queries.log" # optional; otherwise logged via the 'slow_query' logger
+    prometheus_port = 9464        # optional; serves /metrics in Prometheus text format
+"""
+#%%
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+slow_logger = logging.getLogger("slow_query")
+
+_current_page = contextvars.ContextVar("current_page", default="-")
+
+def set_current_page(page):
+    """Record which app page is running, so calls made from it are attributed to it"""
+    _current_page.set(page)
+
+#%%
+def _rows_and_bytes(result):
+    """Best-effort (rows, payload bytes) of a backend result"""
+    if isinstance(result, tuple) and result and hasattr(result[0], "memory_usage"):
+        result = result[0]
+    if hasattr(result, "memory_usage"):
+        return len(result), int(result.memory_usage(index=False, deep=True).sum())
+    if hasattr(result, "inserted"):
+        return result.inserted, 0
+    return 0, 0
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+#%%
+class Metrics:
+    """Rolling per-operation timings plus a slow-query log"""
+
+    def __init__(self, window=1000, slow_ms=200, slow_log=None):
+        self.window = window
+        self.slow_ms = slow_ms
+        self._ops = {}  # op -> {"count", "errors", "rows", "bytes", "durations": deque}
+        self._by_page = {}  # (page, op) -> count
+        self._lock = threading.Lock()
+        if slow_log:
+            handler = logging.FileHandler(slow_log, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            slow_logger.addHandler(handler)
+            slow_logger.setLevel(logging.INFO)
+
+    def record(self, op, seconds, rows=0, nbytes=0, page="-", error=False):
+        with self._lock:
+            stats = self._ops.get(op)
+            if stats is None:
+                stats = self._ops[op] = {
+                    "count": 0, "errors": 0, "rows": 0, "bytes": 0,
+                    "durations": deque(maxlen=self.window),
+                }
+            stats["count"] += 1
+            stats["errors"] += error
+            stats["rows"] += rows
+            stats["bytes"] += nbytes
+            stats["durations"].append(seconds)
+            self._by_page[(page, op)] = self._by_page.get((page, op), 0) + 1
+        ms = seconds * 1000
+        if ms >= self.slow_ms:
+            slow_logger.info(
+                "slow query op=%s page=%s ms=%.1f rows=%d bytes=%d error=%s",
+                op, page, ms, rows, nbytes, error,
+            )
+
+    def snapshot(self):
+        """Return {op: {count, errors, rows, bytes, p50_ms, p95_ms, p99_ms}} plus per-page call counts"""
+        with self._lock:
+            ops = {op: dict(stats, durations=sorted(stats["durations"])) for op, stats in self._ops.items()}
+            by_page = dict(self._by_page)
+        result = {"operations": {}, "calls_by_page": {}}
+        for op, stats in ops.items():
+            durations = stats.pop("durations")
+            stats.update({
+                f"p{int(q * 100)}_ms": _percentile(durations, q) * 1000
+                for q in (0.5, 0.95, 0.99)
+            })
+            result["operations"][op] = stats
+        for (page, op), count in by_page.items():
+            result["calls_by_page"].setdefault(page, {})[op] = count
+        return result
+
+    def to_json(self):
+        """Dump the snapshot as JSON"""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Render the snapshot in Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = [
+            "# TYPE phrases_db_calls_total counter",
+            "# TYPE phrases_db_errors_total counter",
+            "# TYPE phrases_db_rows_total counter",
+            "# TYPE phrases_db_bytes_total counter",
+            "# TYPE phrases_db_latency_seconds summary",
+        ]
+        for op, stats in snap["operations"].items():
+            label = f'op="{op}"'
+            lines.append(f"phrases_db_calls_total{{{label}}} {stats['count']}")
+            lines.append(f"phrases_db_errors_total{{{label}}} {stats['errors']}")
+            lines.append(f"phrases_db_rows_total{{{label}}} {stats['rows']}")
+            lines.append(f"phrases_db_bytes_total{{{label}}} {stats['bytes']}")
+            for q in ("50", "95", "99"):
+                seconds = stats[f"p{q}_ms"] / 1000
+                lines.append(f'phrases_db_latency_seconds{{{label},quantile="0.{q}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port):
+        """Serve GET /metrics on a daemon thread; returns the server"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+#%%
+class InstrumentedBackend:
+    """Proxy around a backend module that times every function call"""
+
+    def __init__(self, backend, metrics):
+        self._backend = backend
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+        metrics = self._metrics
+
+        def timed(*args, **kwargs):
+            page = _current_page.get()
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                metrics.record(name, time.perf_counter() - start, page=page, error=True)
+                raise
+            elapsed = time.perf_counter() - start
+            rows, nbytes = _rows_and_bytes(result)
+            metrics.record(name, elapsed, rows, nbytes, page)
+            return result
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, timed)
+        return timed
@@ -0,0 +1,398 @@
+"""
+Versioned schema migrations for the SQLite database: the one definition of its schema.
+scripts/migrate_db.py applies them from the command line; sqlite_backend only checks
+schema_version, creating a new database here and refusing an outdated one.
+
+Applied versions are recorded in a schema_version table and the missing ones run in
+order, so applying them again is always safe.
+
+- data-moving steps (the phrases rebuild and column backfills) work in id-range
+  batches, one short transaction per batch, so the app's readers and writers get the
+  database between batches
+- every batch commits together with its checkpoint (migration_checkpoint), so an
+  interrupted run resumes after the last committed batch instead of starting over
+- indexes are built once over the copied table instead of being updated row by row
+  during the copy
+"""
+#%%
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+import pandas as pd
+import importer
+import near_duplicates
+import scheduler
+import search
+import youtube
+
+logger = logging.getLogger("migrations")
+
+DEFAULT_BATCH_SIZE = 10000  # rows copied or backfilled per transaction
+
+DEFAULT_USERNAME = "default_user"
+DEFAULT_PASSWORD = "password123"
+
+#%%
+VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS migration_checkpoint (
+    version INTEGER PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    copied INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+USERS_TABLE = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# The original phrases table, without its indexes (see create_indexes); later columns
+# are added by their own migrations
+PHRASES_TABLE = """
+CREATE TABLE phrases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    phrase TEXT NOT NULL,
+    meaning TEXT,
+    youtube_url TEXT,
+    timestamp INTEGER,
+    is_learned BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+)
+"""
+
+PHRASE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_phrases_user_learned_created
+    ON phrases (user_id, is_learned, created_at);
+CREATE INDEX IF NOT EXISTS idx_phrases_user_created
+    ON phrases (user_id, created_at);
+"""
+
+CONTENT_HASH_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_phrases_user_content_hash
+    ON phrases (user_id, content_hash);
+"""
+
+DUE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_phrases_user_learned_due
+    ON phrases (user_id, is_learned, due_at);
+"""
+
+VIDEO_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_phrases_user_video
+    ON phrases (user_id, video_id, timestamp);
+"""
+
+# Full-text search: terms come from search.index_text(), so the tokenizer only splits
+# on spaces (bigrams of Japanese text are single tokens). New rows are indexed by
+# sqlite_backend.sync_search_index, deletes by the trigger.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS phrases_fts USING fts5(
+    phrase, meaning, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS phrases_fts_delete AFTER DELETE ON phrases BEGIN
+    DELETE FROM phrases_fts WHERE rowid = old.id;
+END;
+"""
+
+SQL_TABLE_EXISTS = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+SQL_APPLIED = "SELECT version, name, applied_at FROM schema_version ORDER BY version"
+SQL_RECORD = "INSERT INTO schema_version (version, name) VALUES (?, ?)"
+SQL_CHECKPOINT = "SELECT last_id, copied FROM migration_checkpoint WHERE version = ?"
+SQL_SAVE_CHECKPOINT = (
+    "INSERT OR REPLACE INTO migration_checkpoint (version, last_id, copied) VALUES (?, ?, ?)"
+)
+SQL_CLEAR_CHECKPOINT = "DELETE FROM migration_checkpoint WHERE version = ?"
+SQL_INSERT_USER = "INSERT INTO users (username, password_hash) VALUES (?, ?)"
+SQL_FIRST_USER = "SELECT id FROM users ORDER BY id LIMIT 1"
+SQL_COPY_PHRASES = """
+INSERT INTO phrases (id, user_id, phrase, meaning, youtube_url, timestamp, is_learned, created_at)
+SELECT id, ?, phrase, meaning, youtube_url, timestamp, is_learned, created_at
+FROM phrases_old WHERE id > ? AND id <= ?
+"""
+SQL_HASHLESS = (
+    "SELECT id, phrase, meaning FROM phrases "
+    "WHERE content_hash IS NULL AND id > ? AND id <= ? ORDER BY id"
+)
+# OR IGNORE: a row duplicating one hashed before it keeps a NULL hash (NULLs never
+# collide in the unique index), so no user data is touched
+SQL_SET_HASH = "UPDATE OR IGNORE phrases SET content_hash = ? WHERE id = ?"
+SQL_BACKFILL_DUE = (
+    "UPDATE phrases SET due_at = created_at WHERE due_at IS NULL AND id > ? AND id <= ?"
+)
+SQL_UNSIGNED = "SELECT id, phrase FROM phrases WHERE minhash IS NULL AND id > ? AND id <= ?"
+SQL_SET_MINHASH = "UPDATE phrases SET minhash = ? WHERE id = ?"
+SQL_UNLINKED = (
+    "SELECT id, youtube_url, timestamp FROM phrases "
+    "WHERE video_link IS NULL AND id > ? AND id <= ?"
+)
+SQL_SET_VIDEO = "UPDATE phrases SET video_id = ?, video_link = ? WHERE id = ?"
+SQL_FTS_LAST_ID = "SELECT rowid FROM phrases_fts ORDER BY rowid DESC LIMIT 1"
+SQL_FTS_INDEX_RANGE = (
+    "INSERT INTO phrases_fts (rowid, phrase, meaning) "
+    "SELECT id, index_text(phrase), index_text(meaning) FROM phrases WHERE id > ? AND id <= ?"
+)
+
+#%%
+class SchemaError(RuntimeError):
+    """The database needs migrations that are too slow to run on app startup"""
+
+def connect(path):
+    """Autocommit connection: transactions are opened explicitly by transaction(),
+    since sqlite3 would otherwise commit DDL statements on their own"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(VERSION_SCHEMA)
+    return conn
+
+@contextmanager
+def transaction(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def table_exists(conn, name):
+    return conn.execute(SQL_TABLE_EXISTS, (name,)).fetchone() is not None
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def add_columns(conn, added):
+    """Add the missing ones of {name: DDL type} to phrases (no table rewrite in SQLite)"""
+    existing = set(columns(conn, "phrases"))
+    with transaction(conn):
+        for name, ddl in added.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE phrases ADD COLUMN {name} {ddl}")
+
+def in_batches(conn, version, source, step, batch_size=DEFAULT_BATCH_SIZE):
+    """Call step(low, high) for consecutive id ranges `id > low AND id <= high` of
+    source, each in its own transaction committed together with a checkpoint, resuming
+    from the last one. step returns the rows it wrote; returns their total."""
+    last_id, copied = conn.execute(SQL_CHECKPOINT, (version,)).fetchone() or (0, 0)
+    total = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+    if last_id:
+        logger.info("  Resuming after id %d (%d rows already done)", last_id, copied)
+    started = time.perf_counter()
+    while True:
+        # Upper bound from the ids actually present, so gaps in ids don't make empty batches
+        upper = conn.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {source} WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size),
+        ).fetchone()[0]
+        if upper is None:
+            return copied
+        with transaction(conn):
+            copied += step(last_id, upper)
+            conn.execute(SQL_SAVE_CHECKPOINT, (version, upper, copied))
+        last_id = upper
+        rate = copied / max(time.perf_counter() - started, 1e-9)
+        logger.info("  %d rows up to id %d of %d rows (%.0f rows/s)", copied, upper, total, rate)
+
+def copy_in_batches(conn, version, source, copy_sql, *params, batch_size=DEFAULT_BATCH_SIZE):
+    """in_batches for one SQL statement taking *params, then the id range"""
+    return in_batches(
+        conn, version, source,
+        lambda low, high: conn.execute(copy_sql, (*params, low, high)).rowcount,
+        batch_size=batch_size,
+    )
+
+#%%
+@dataclass
+class Migration:
+    version: int
+    name: str
+    apply: Callable  # apply(conn, version, batch_size); must be safe to run again
+
+def create_users(conn, version, batch_size):
+    """Multi-user support: users table, plus a default user owning the phrases of a
+    single-user database"""
+    if table_exists(conn, "users"):
+        return
+    with transaction(conn):
+        conn.execute(USERS_TABLE)
+        if not table_exists(conn, "phrases"):
+            return
+        conn.execute(SQL_INSERT_USER, (
+            DEFAULT_USERNAME, hashlib.sha256(DEFAULT_PASSWORD.encode()).hexdigest()
+        ))
+    logger.info("  Created default user (username: '%s', password: '%s')",
+                DEFAULT_USERNAME, DEFAULT_PASSWORD)
+
+def add_phrase_user_id(conn, version, batch_size):
+    """Rebuild phrases with a user_id column (SQLite can't add the foreign key in
+    place): rename it to phrases_old, copy in batches, then drop phrases_old"""
+    copying = table_exists(conn, "phrases_old")
+    if not copying:
+        if not table_exists(conn, "phrases"):
+            with transaction(conn):
+                conn.execute(PHRASES_TABLE)
+            return
+        if "user_id" in columns(conn, "phrases"):
+            return
+        # Rename, new table and checkpoint commit together: a crash leaves either the
+        # original table or a copy in progress that the next run picks up
+        with transaction(conn):
+            conn.execute("ALTER TABLE phrases RENAME TO phrases_old")
+            conn.execute(PHRASES_TABLE)
+            conn.execute(SQL_SAVE_CHECKPOINT, (version, 0, 0))
+
+    row = conn.execute(SQL_FIRST_USER).fetchone()
+    if row is None:
+        raise RuntimeError("Users table exists but no users found!")
+    copied = copy_in_batches(conn, version, "phrases_old", SQL_COPY_PHRASES, row[0],
+                             batch_size=batch_size)
+    with transaction(conn):
+        conn.execute("DROP TABLE phrases_old")
+        conn.execute(SQL_CLEAR_CHECKPOINT, (version,))
+    logger.info("  %d existing phrases assigned to user ID %d", copied, row[0])
+
+def create_indexes(conn, version, batch_size):
+    """Composite indexes for the app's access paths, built after the bulk copy"""
+    conn.executescript(PHRASE_INDEXES)
+
+def add_content_hash(conn, version, batch_size):
+    """Per-user unique content hash (importer.py), so imports are idempotent upserts.
+    The index comes first: duplicates already stored then keep a NULL hash."""
+    add_columns(conn, {"content_hash": "TEXT"})
+    conn.executescript(CONTENT_HASH_INDEX)
+
+    def backfill(low, high):
+        df = pd.read_sql_query(SQL_HASHLESS, conn, params=(low, high))
+        hashes = importer.content_hashes(
+            df["phrase"].fillna("").astype(str), df["meaning"].fillna("").astype(str)
+        )
+        return conn.executemany(SQL_SET_HASH, zip(hashes, df["id"].astype(int).tolist())).rowcount
+
+    in_batches(conn, version, "phrases", backfill, batch_size=batch_size)
+
+def add_schedule(conn, version, batch_size):
+    """SM-2 review schedule (scheduler.py); phrases are first due when they were added"""
+    add_columns(conn, {
+        "due_at": "TIMESTAMP",
+        "interval_days": "REAL DEFAULT 0",
+        "ease": f"REAL DEFAULT {scheduler.DEFAULT_EASE}",
+        "repetitions": "INTEGER DEFAULT 0",
+    })
+    copy_in_batches(conn, version, "phrases", SQL_BACKFILL_DUE, batch_size=batch_size)
+    conn.executescript(DUE_INDEX)
+
+def add_minhash(conn, version, batch_size):
+    """near_duplicates.py signature of each phrase, as a BLOB"""
+    add_columns(conn, {"minhash": "BLOB"})
+
+    def backfill(low, high):
+        df = pd.read_sql_query(SQL_UNSIGNED, conn, params=(low, high))
+        return conn.executemany(SQL_SET_MINHASH, zip(
+            near_duplicates.signature_blobs(df["phrase"]), df["id"].astype(int).tolist()
+        )).rowcount
+
+    in_batches(conn, version, "phrases", backfill, batch_size=batch_size)
+
+def add_video_links(conn, version, batch_size):
+    """Canonical video id and deep link (youtube.py), and the per-video index"""
+    add_columns(conn, {"video_id": "TEXT", "video_link": "TEXT"})
+
+    def backfill(low, high):
+        df = pd.read_sql_query(SQL_UNLINKED, conn, params=(low, high))
+        ids = youtube.video_ids(df["youtube_url"])
+        links = youtube.deep_links(df["youtube_url"], df["timestamp"], ids)
+        return conn.executemany(SQL_SET_VIDEO, zip(ids, links, df["id"].astype(int).tolist())).rowcount
+
+    in_batches(conn, version, "phrases", backfill, batch_size=batch_size)
+    conn.executescript(VIDEO_INDEX)
+
+def create_search_index(conn, version, batch_size):
+    """FTS5 table over search.index_text() of phrase/meaning, filled in batches"""
+    conn.executescript(SEARCH_SCHEMA)
+    conn.create_function("index_text", 1, search.index_text, deterministic=True)
+    row = conn.execute(SQL_FTS_LAST_ID).fetchone()
+    indexed = row[0] if row else 0  # rows the app already indexed before this migration
+    in_batches(conn, version, "phrases", lambda low, high: conn.execute(
+        SQL_FTS_INDEX_RANGE, (max(low, indexed), high)
+    ).rowcount, batch_size=batch_size)
+
+MIGRATIONS = [
+    Migration(1, "users table", create_users),
+    Migration(2, "phrases.user_id", add_phrase_user_id),
+    Migration(3, "phrase indexes", create_indexes),
+    Migration(4, "phrases.content_hash", add_content_hash),
+    Migration(5, "SM-2 schedule", add_schedule),
+    Migration(6, "phrases.minhash", add_minhash),
+    Migration(7, "video ids and links", add_video_links),
+    Migration(8, "full-text search", create_search_index),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+#%%
+def applied_versions(conn):
+    if not table_exists(conn, "schema_version"):
+        return set()
+    return {row[0] for row in conn.execute(SQL_APPLIED)}
+
+def apply_migrations(conn, batch_size=DEFAULT_BATCH_SIZE):
+    """Apply every migration not yet recorded in schema_version, in order, on an
+    autocommit connection (see connect). Returns the migrations applied."""
+    conn.executescript(VERSION_SCHEMA)
+    done = applied_versions(conn)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        logger.info("[%d] %s...", migration.version, migration.name)
+        started = time.perf_counter()
+        migration.apply(conn, migration.version, batch_size)
+        with transaction(conn):
+            conn.execute(SQL_RECORD, (migration.version, migration.name))
+            conn.execute(SQL_CLEAR_CHECKPOINT, (migration.version,))
+        logger.info("[%d] done in %.2fs", migration.version, time.perf_counter() - started)
+        applied.append(migration)
+    return applied
+
+def migrate_database(path, batch_size=DEFAULT_BATCH_SIZE):
+    """apply_migrations on the database file at path"""
+    conn = connect(path)
+    try:
+        return apply_migrations(conn, batch_size)
+    finally:
+        conn.close()
+
+def ensure_current(conn):
+    """Check that conn's database has every migration. A new, empty database gets
+    them here (there is nothing to backfill); an existing one behind the latest
+    version raises SchemaError, since its backfills belong in scripts/migrate_db.py."""
+    done = applied_versions(conn)
+    if all(m.version in done for m in MIGRATIONS):
+        return
+    if done or table_exists(conn, "phrases"):
+        pending = ", ".join(str(m.version) for m in MIGRATIONS if m.version not in done)
+        raise SchemaError(
+            f"Database schema is missing migrations {pending}: "
+            "run `python scripts/migrate_db.py` first."
+        )
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # transactions are explicit (see transaction())
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.isolation_level = isolation_level
@@ -0,0 +1,244 @@
+"""
+Frame-aware MP3 assembly for radio episodes.
+gTTS returns complete MP3 files (ID3 tag, Xing/Info header frame, audio frames).
+Gluing them end to end repeats those headers, which bloats the file and confuses
+players about duration and seeking. This module:
+
+- walks the MPEG audio frames of each clip, dropping ID3v1/ID3v2 tags and Xing/Info/VBRI frames
+- builds silence from the clip's own frame header (zeroed side info decodes as silence)
+- computes the final size first, then copies every frame once into a preallocated buffer
+  (or streams it to a file) through memoryviews
+- returns a seek index: label -> byte offset and time offset of each phrase
+"""
+#%%
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Bitrates in kbps, indexed by [version is MPEG1][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# Sample rates indexed by version bits (0 = MPEG2.5, 2 = MPEG2, 3 = MPEG1)
+_SAMPLE_RATES = {0: [11025, 12000, 8000], 2: [22050, 24000, 16000], 3: [44100, 48000, 32000]}
+_LAYERS = {1: 3, 2: 2, 3: 1}  # layer bits -> layer number
+
+ID3V1_SIZE = 128
+
+#%%
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int        # raw version bits: 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer: int          # 1, 2 or 3
+    has_crc: bool
+    bitrate: int        # kbps
+    sample_rate: int
+    padding: int
+    mono: bool
+    raw: bytes          # the 4 header bytes
+
+    @property
+    def mpeg1(self):
+        return self.version == 3
+
+    @property
+    def samples(self):
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and not self.mpeg1:
+            return 576
+        return 1152
+
+    @property
+    def length(self):
+        """Frame length in bytes, header included"""
+        if self.layer == 1:
+            return (12 * self.bitrate * 1000 // self.sample_rate + self.padding) * 4
+        slot_factor = 72 if (self.layer == 3 and not self.mpeg1) else 144
+        return slot_factor * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def duration(self):
+        """Frame duration in seconds"""
+        return self.samples / self.sample_rate
+
+def parse_header(b):
+    """Return a FrameHeader for 4 bytes starting with a frame sync, or None if invalid"""
+    if len(b) < 4 or b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    return _parse_header(bytes(b[:4]))
+
+@lru_cache(maxsize=256)
+def _parse_header(b):
+    # A clip repeats a handful of distinct headers, so decoding is memoized
+    version = (b[1] >> 3) & 3
+    layer_bits = (b[1] >> 1) & 3
+    bitrate_index = b[2] >> 4
+    rate_index = (b[2] >> 2) & 3
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved / free-format / bad values
+    layer = _LAYERS[layer_bits]
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        has_crc=not (b[1] & 1),
+        bitrate=_BITRATES[version == 3][layer][bitrate_index],
+        sample_rate=_SAMPLE_RATES[version][rate_index],
+        padding=(b[2] >> 1) & 1,
+        mono=(b[3] >> 6) == 3,
+        raw=b,
+    )
+
+def _is_info_frame(frame, header):
+    """True for Xing/Info/VBRI header frames, which carry metadata, not audio"""
+    if header.layer != 3:
+        return False
+    if header.mpeg1:
+        side_info = 17 if header.mono else 32
+    else:
+        side_info = 9 if header.mono else 17
+    offset = 4 + (2 if header.has_crc else 0) + side_info
+    tag = bytes(frame[offset:offset + 4])
+    return tag in (b"Xing", b"Info") or bytes(frame[36:40]) == b"VBRI"
+
+def _id3v2_size(data, pos):
+    """Total size of an ID3v2 tag starting at pos"""
+    flags = data[pos + 5]
+    size = 0
+    for byte in data[pos + 6:pos + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    return 10 + size + (10 if flags & 0x10 else 0)
+
+def _is_id3v1(data, pos):
+    """A 128-byte 'TAG' block at the end of a clip (or before the next concatenated clip)"""
+    after = pos + ID3V1_SIZE
+    if after == len(data):
+        return True
+    return after < len(data) and (data[after] == 0xFF or data[after:after + 3] == b"ID3")
+
+#%%
+def audio_frames(data):
+    """Return (frames, first_header) for an MP3 clip.
+    frames is a list of memoryview slices of data, one per audio frame, with tags and
+    Xing/Info/VBRI frames removed. Junk between frames is skipped byte by byte.
+    """
+    view = memoryview(data)
+    frames = []
+    first = None
+    clip_start = True  # Xing/Info/VBRI can only be the first frame of a (concatenated) file
+    pos, end = 0, len(view)
+    while pos + 4 <= end:
+        if view[pos] != 0xFF:
+            if view[pos:pos + 3] == b"ID3" and pos + 10 <= end:
+                pos += _id3v2_size(view, pos)
+                clip_start = True
+            elif view[pos:pos + 3] == b"TAG" and _is_id3v1(view, pos):
+                pos += ID3V1_SIZE
+                clip_start = True
+            else:
+                pos += 1
+            continue
+        header = parse_header(view[pos:pos + 4])
+        if header is None or pos + header.length > end:
+            pos += 1
+            continue
+        frame = view[pos:pos + header.length]
+        if not (clip_start and _is_info_frame(frame, header)):
+            frames.append(frame)
+            first = first or header
+        clip_start = False
+        pos += header.length
+    return frames, first
+
+def silence_frame(header):
+    """One silent frame in the same format as header (no CRC, no padding)"""
+    raw = bytearray(header.raw)
+    raw[1] |= 0x01   # protection bit set: no CRC
+    raw[2] &= ~0x02  # no padding
+    silent = parse_header(raw)
+    return bytes(raw) + bytes(silent.length - 4)
+
+def silence(header, ms):
+    """Return (bytes, seconds) of silence at least `ms` long matching header's format"""
+    if ms <= 0 or header is None:
+        return b"", 0.0
+    frame = silence_frame(header)
+    count = max(1, round(ms / 1000 / header.duration))
+    return frame * count, count * header.duration
+
+#%%
+class EpisodeAssembler:
+    """Collects labelled groups of clips, then writes them as one continuous MP3"""
+
+    def __init__(self, gap_ms=500):
+        self.gap_ms = gap_ms
+        self._groups = []   # (label, [frames, silence, frames, silence, ...])
+        self._silence = {}  # frame format -> (bytes, seconds)
+        self.size = 0
+
+    def _gap(self, header):
+        if header is None:
+            return b"", 0.0
+        key = (header.version, header.layer, header.bitrate, header.sample_rate, header.mono)
+        if key not in self._silence:
+            self._silence[key] = silence(header, self.gap_ms)
+        return self._silence[key]
+
+    def add(self, label, clips):
+        """Add one phrase: clips are played in order, each followed by a gap of silence"""
+        pieces = []
+        for clip in clips:
+            frames, header = audio_frames(clip)
+            if header is None:
+                # Not MPEG audio we understand: keep the bytes rather than drop the clip
+                frames, duration = [memoryview(clip)], 0.0
+            else:
+                duration = len(frames) * header.duration
+            gap, gap_seconds = self._gap(header)
+            pieces.append((frames, duration))
+            pieces.append(([memoryview(gap)] if gap else [], gap_seconds))
+            self.size += sum(len(f) for f in frames) + len(gap)
+        self._groups.append((label, pieces))
+
+    def _chunks(self):
+        """Yield every frame / silence run as a memoryview, in output order"""
+        for _, pieces in self._groups:
+            for frames, _ in pieces:
+                yield from frames
+
+    def seek_index(self):
+        """[{label, byte, seconds}] for the start of each phrase"""
+        index = []
+        byte = 0
+        seconds = 0.0
+        for label, pieces in self._groups:
+            index.append({"label": label, "byte": byte, "seconds": round(seconds, 3)})
+            for frames, duration in pieces:
+                byte += sum(len(f) for f in frames)
+                seconds += duration
+        return index
+
+    def to_bytes(self):
+        """Copy every frame exactly once into a preallocated buffer (returned as bytearray)"""
+        buf = bytearray(self.size)
+        out = memoryview(buf)
+        pos = 0
+        for chunk in self._chunks():
+            out[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+        return buf
+
+    def write_to(self, f):
+        """Stream the episode to a binary file object; returns bytes written"""
+        written = 0
+        for chunk in self._chunks():
+            written += f.write(chunk)
+        return written
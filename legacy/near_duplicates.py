@@ -0,0 +1,188 @@
+"""
+Near-duplicate phrase detection with MinHash signatures and LSH banding.
+Overlapping shadowing lists leave phrases that differ only in punctuation or a word.
+Comparing every pair is quadratic, so instead:
+
+- each phrase gets a MinHash signature (NUM_PERM minimums over its character
+  shingles) when it is written; signatures are stored as NUM_PERM uint32 bytes
+- finding duplicates splits signatures into BANDS bands; phrases sharing any band are
+  candidates, kept if their signatures agree on at least `threshold` of positions
+  (an estimate of shingle Jaccard similarity), then joined into groups
+- groups are connected components, so a chain of near-matches can join phrases that
+  aren't alike themselves: callers compare each member with the phrase they keep
+  (similarities) before acting on it
+
+Everything runs on numpy arrays over whole batches, so signing an import chunk or
+grouping a 100k-phrase library takes well under a second.
+"""
+#%%
+import numpy as np
+import pandas as pd
+import youtube
+
+SHINGLE = 4             # characters per shingle
+NUM_PERM = 64           # hash functions (signature length)
+BANDS = 16              # LSH bands; rows per band = NUM_PERM // BANDS
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.6 # minimum estimated similarity for a pair to be grouped
+SIGN_BATCH = 2000       # phrases per vectorized signing batch (bounds memory)
+VERIFY_BATCH = 200000   # candidate pairs compared at once (bounds memory)
+
+_rng = np.random.default_rng(20240601)  # fixed seed: stored signatures must stay comparable
+_A = (_rng.integers(1, 2**32, NUM_PERM, dtype=np.uint64) | 1).astype(np.uint32)[:, None]
+_B = _rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64).astype(np.uint32)[:, None]
+
+#%%
+def _shingle_text(phrases):
+    """Lowercase, drop punctuation, collapse spaces; pad to at least one shingle"""
+    text = (
+        pd.Series(phrases, dtype=object).fillna("").astype(str)
+        .str.lower()
+        .str.replace(r"[^\w\s]", "", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+    return text.str.pad(SHINGLE, side="right")
+
+def _mix(x):
+    """32-bit finalizer (murmur3 fmix32) so nearby shingle values hash far apart"""
+    x = x ^ (x >> 16)
+    x = x * np.uint32(0x85EBCA6B)
+    x = x ^ (x >> 13)
+    x = x * np.uint32(0xC2B2AE35)
+    return x ^ (x >> 16)
+
+def _sign_batch(texts):
+    # All texts as one code point array separated by NUL; a window is a shingle
+    # unless it contains a separator
+    codes = np.frombuffer("\0".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    windows = len(codes) - SHINGLE + 1
+    value = np.zeros(windows, dtype=np.uint32)
+    valid = np.ones(windows, dtype=bool)
+    for offset in range(SHINGLE):
+        part = codes[offset:offset + windows]
+        value = value * np.uint32(0x01000193) + part
+        valid &= part != 0
+    doc = np.cumsum(codes == 0)[:windows][valid]  # windows never start on a separator
+    hashes = _mix(value[valid])
+    with np.errstate(over="ignore"):
+        permuted = _A * hashes + _B  # (NUM_PERM, shingles), mod 2**32
+    starts = np.flatnonzero(np.r_[True, doc[1:] != doc[:-1]])
+    return np.minimum.reduceat(permuted, starts, axis=1).T  # (texts, NUM_PERM)
+
+def signatures(phrases):
+    """(len(phrases), NUM_PERM) uint32 MinHash signatures"""
+    texts = _shingle_text(phrases).tolist()
+    if not texts:
+        return np.empty((0, NUM_PERM), dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        return np.vstack([
+            _sign_batch(texts[start:start + SIGN_BATCH])
+            for start in range(0, len(texts), SIGN_BATCH)
+        ])
+
+def signature_blobs(phrases):
+    """Signatures as bytes, the stored form (one per phrase)"""
+    return [row.tobytes() for row in signatures(phrases)]
+
+def signature_blob(phrase):
+    return signature_blobs([phrase])[0]
+
+def from_blobs(blobs, phrases):
+    """(n, NUM_PERM) array from stored blobs; missing ones are computed from phrases"""
+    blobs = list(blobs)
+    missing = [i for i, blob in enumerate(blobs) if not blob or len(blob) != NUM_PERM * 4]
+    if missing:
+        phrases = list(phrases)
+        for i, blob in zip(missing, signature_blobs([phrases[i] for i in missing])):
+            blobs[i] = blob
+    if not blobs:
+        return np.empty((0, NUM_PERM), dtype=np.uint32)
+    return np.frombuffer(b"".join(blobs), dtype=np.uint32).reshape(len(blobs), NUM_PERM)
+
+#%%
+def _band_keys(sigs):
+    """(n, BANDS) uint64 key per band"""
+    bands = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for row in range(ROWS):
+            keys = keys * np.uint64(0x100000001B3) ^ bands[:, :, row]
+    return keys
+
+def _candidate_pairs(sigs):
+    """Unique (i, j) index pairs sharing at least one band bucket.
+    Each bucket contributes (first member, other member) pairs: linear in bucket size."""
+    keys = _band_keys(sigs)
+    pairs = []
+    for band in range(BANDS):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+        first = order[np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))]
+        member = order[~starts]
+        pairs.append(np.stack([first[~starts], member], axis=1))
+    # Dedupe across bands on a single int64 key (much faster than unique(axis=0))
+    n = len(sigs)
+    pairs = np.concatenate(pairs).astype(np.int64)
+    codes = np.unique(pairs[:, 0] * n + pairs[:, 1])
+    return np.stack([codes // n, codes % n], axis=1)
+
+def _components(n, pairs):
+    """Connected-component label (smallest member index) for every node"""
+    labels = np.arange(n)
+    while len(pairs):
+        low = np.minimum(labels[pairs[:, 0]], labels[pairs[:, 1]])
+        updated = labels.copy()
+        np.minimum.at(updated, pairs[:, 0], low)
+        np.minimum.at(updated, pairs[:, 1], low)
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+def group_duplicates(ids, sigs, threshold=DEFAULT_THRESHOLD):
+    """Return groups of near-duplicate ids, largest group first.
+    ids and sigs are aligned (sigs from from_blobs / signatures)."""
+    ids = np.asarray(ids)
+    if len(ids) < 2:
+        return []
+    pairs = _candidate_pairs(sigs)
+    keep = np.zeros(len(pairs), dtype=bool)
+    for start in range(0, len(pairs), VERIFY_BATCH):
+        batch = pairs[start:start + VERIFY_BATCH]
+        keep[start:start + VERIFY_BATCH] = similarities(sigs, batch[:, 0], batch[:, 1]) >= threshold
+    labels = _components(len(ids), pairs[keep])
+
+    # Only nodes whose component has another member
+    roots, counts = np.unique(labels, return_counts=True)
+    members = np.flatnonzero(np.isin(labels, roots[counts > 1]))
+    order = members[np.argsort(labels[members], kind="stable")]
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    groups = [ids[g].tolist() for g in np.split(order, starts[1:])] if len(order) else []
+    return sorted(groups, key=len, reverse=True)
+
+def similarities(sigs, left, right):
+    """Estimated Jaccard similarity of rows left[k] and right[k] of sigs, for every k"""
+    return (sigs[left] == sigs[right]).mean(axis=1)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float((np.asarray(sig_a) == np.asarray(sig_b)).mean())
+
+#%%
+def merged_fields(rows):
+    """Fields for the kept phrase when merging rows (dicts, kept row first): the first
+    non-empty video URL with its timestamp (and derived video id/link), and learned if
+    any of them was learned"""
+    linked = next((r for r in rows if r.get("youtube_url")), rows[0])
+    url, timestamp = linked.get("youtube_url") or "", int(linked.get("timestamp") or 0)
+    return {
+        "youtube_url": url,
+        "timestamp": timestamp,
+        "video_id": youtube.video_id(url),
+        "video_link": youtube.deep_link(url, timestamp),
+        "is_learned": any(bool(r.get("is_learned")) for r in rows),
+    }
@@ -0,0 +1,146 @@
+"""
+Text normalization for phrases and meanings.
+Rules are compiled once at import and applied to whole pandas Series through the
+.str accessor, so a CSV column is cleaned in a handful of vectorized passes. Text is
+normalized when it is written (importer.prepare_records, database.add_phrase) and
+stored that way; read and audio paths use it as is.
+
+- fullwidth:  full-width ASCII (Ａ, １, ［, ！) and the ideographic space -> ASCII
+- quotes:     curly quotes -> straight quotes
+- references: reference numbers like [1], [1, 3]
+- whitespace: runs of whitespace -> one space, stripped at both ends
+
+Rules are applied in that order (full-width brackets become ASCII before references
+are matched); pass a subset of names to compose() for other pipelines. Two more rules
+build comparison keys rather than stored text (KEY_PIPELINE, used for content hashes
+and audio cache keys):
+
+- nfkc:       Unicode NFKC compatibility normalization
+- casefold:   str.casefold
+
+Each pass only touches the cells that can change: translate tables and NFKC only
+non-ASCII cells, the reference rule only cells containing "[", and adjacent translate
+rules are merged into a single table.
+"""
+#%%
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable
+
+#%%
+@dataclass(frozen=True)
+class Rule:
+    """A str.translate table (non-ASCII characters only), a precompiled regex
+    substitution optionally skipped for cells not containing `guard`, or a str -> str
+    function optionally skipped for ASCII cells (`ascii_noop`)"""
+    name: str
+    pattern: re.Pattern = None
+    repl: str = ""
+    table: dict = None
+    guard: str = None
+    function: Callable = None
+    ascii_noop: bool = False
+
+    def apply(self, series):
+        """Vectorized over a Series of str"""
+        if self.function is not None and not self.ascii_noop:
+            return series.map(self.function)
+        if self.table is not None or self.ascii_noop:
+            mask = ~series.map(str.isascii)
+        elif self.guard is not None:
+            mask = series.str.contains(self.guard, regex=False)
+        else:
+            return series.str.replace(self.pattern, self.repl, regex=True)
+        if not mask.any():
+            return series
+        series = series.copy()
+        if self.table is not None:
+            series[mask] = series[mask].str.translate(self.table)
+        elif self.function is not None:
+            series[mask] = series[mask].map(self.function)
+        else:
+            series[mask] = series[mask].str.replace(self.pattern, self.repl, regex=True)
+        return series
+
+    def apply_text(self, text):
+        if self.table is not None:
+            return text.translate(self.table)
+        if self.function is not None:
+            return self.function(text)
+        return self.pattern.sub(self.repl, text)
+
+_FULLWIDTH = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_FULLWIDTH[0x3000] = ord(" ")
+
+_QUOTES = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "′": "'",
+    "“": '"', "”": '"', "„": '"', "″": '"',
+})
+
+_WHITESPACE = re.compile(r"\s+")
+
+RULES = {
+    "fullwidth": Rule("fullwidth", table=_FULLWIDTH),
+    "quotes": Rule("quotes", table=_QUOTES),
+    # Replaced by a space (not removed) so "word [1] word" doesn't glue the words together
+    "references": Rule("references", pattern=re.compile(r"\s*\[\d+(?:,\s*\d+)*\]\s*"), repl=" ",
+                       guard="["),
+    "whitespace": Rule("whitespace", pattern=_WHITESPACE, repl=" "),
+    "nfkc": Rule("nfkc", function=lambda text: unicodedata.normalize("NFKC", text),
+                 ascii_noop=True),
+    "casefold": Rule("casefold", function=str.casefold),
+}
+
+DEFAULT_RULES = ("fullwidth", "quotes", "references", "whitespace")
+KEY_RULES = ("nfkc", "casefold", "whitespace")
+
+def compose(*names):
+    """Return the rules for names, in the given order (adjacent tables merged)"""
+    unknown = [name for name in names if name not in RULES]
+    if unknown:
+        raise ValueError(f"Unknown normalization rule(s): {', '.join(unknown)}")
+    rules = []
+    for name in names:
+        rule = RULES[name]
+        if rules and rule.table is not None and rules[-1].table is not None:
+            rule = Rule(f"{rules[-1].name}+{name}", table={**rules[-1].table, **rule.table})
+            rules.pop()
+        rules.append(rule)
+    return tuple(rules)
+
+DEFAULT_PIPELINE = compose(*DEFAULT_RULES)
+KEY_PIPELINE = compose(*KEY_RULES)
+
+#%%
+def normalize_series(series, rules=DEFAULT_PIPELINE):
+    """Normalize a Series; non-string cells are converted with str, missing ones kept"""
+    mask = series.notna()
+    text = series[mask].astype(str)
+    for rule in rules:
+        text = rule.apply(text)
+    if "whitespace" in (rule.name for rule in rules):
+        text = text.str.strip()
+    out = series.astype(object)
+    out[mask] = text
+    return out
+
+def normalize_frame(df, columns=None, rules=DEFAULT_PIPELINE):
+    """Return a copy of df with columns (default: all object columns) normalized"""
+    df = df.copy()
+    if columns is None:
+        columns = df.select_dtypes(include="object").columns
+    for column in columns:
+        df[column] = normalize_series(df[column], rules)
+    return df
+
+def normalize_text(text, rules=DEFAULT_PIPELINE):
+    """Scalar version of normalize_series (None stays None)"""
+    if text is None:
+        return None
+    text = str(text)
+    for rule in rules:
+        text = rule.apply_text(text)
+    if "whitespace" in (rule.name for rule in rules):
+        text = text.strip()
+    return text
@@ -0,0 +1,145 @@
+"""
+Background pre-rendering of each user's Radio Mode episode.
+database.py notifies the prerenderer whenever a user's phrases change; a worker
+thread then rebuilds that user's episode so Radio Mode can play it instantly.
+
+- requests are coalesced per user: any number of changes while a rebuild is
+  queued or running cause at most one more rebuild
+- rebuilds are incremental: segments of phrases that are still in the episode
+  are reused from the previous build, only new or edited ones are synthesized
+- the episode is spliced from the stored segments by mp3.EpisodeAssembler
+"""
+#%%
+import hashlib
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+import radio
+from mp3 import EpisodeAssembler
+from tts_engines import synthesize_many
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PHRASES = 20   # phrases per pre-rendered episode
+
+#%%
+@dataclass
+class Episode:
+    audio: bytes
+    seek_index: list
+    signature: str      # hash of the segment texts, to tell whether it is current
+    built_at: float
+    phrases: int
+    synthesized: int    # segments rendered in this build (the rest were reused)
+
+@dataclass
+class _UserState:
+    episode: Episode = None
+    segments: dict = field(default_factory=dict)  # (text, lang) -> bytes from the last build
+    queued: bool = False
+    running: bool = False
+    dirty: bool = False
+
+def episode_signature(segments):
+    """Stable hash of [(phrase_text, meaning_text), ...]"""
+    digest = hashlib.sha1()
+    for phrase_text, meaning_text in segments:
+        digest.update(f"{phrase_text}\x1f{meaning_text}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+#%%
+class EpisodePrerenderer:
+    """Job queue + worker thread that keeps a ready-to-play episode per user"""
+
+    def __init__(self, load_phrases, synthesize, phrases=DEFAULT_PHRASES,
+                 workers=radio.DEFAULT_WORKERS, gap_ms=radio.DEFAULT_GAP_MS):
+        self.load_phrases = load_phrases  # user_id -> DataFrame of phrases to play, in order
+        self.synthesize = synthesize
+        self.phrases = phrases
+        self.workers = workers
+        self.gap_ms = gap_ms
+        self._users = {}
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue()
+        threading.Thread(target=self._run, daemon=True, name="radio-prerender").start()
+
+    def _state(self, user_id):
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState()
+        return state
+
+    def request_rebuild(self, user_id):
+        """Schedule a rebuild for user_id (coalesced with any pending one)"""
+        with self._lock:
+            state = self._state(user_id)
+            if state.running:
+                state.dirty = True
+                return
+            if state.queued:
+                return
+            state.queued = True
+        self._jobs.put(user_id)
+
+    def get_episode(self, user_id):
+        """Return the last built Episode for user_id, or None"""
+        with self._lock:
+            state = self._users.get(user_id)
+            return state.episode if state is not None else None
+
+    def is_pending(self, user_id):
+        """True while a rebuild for user_id is queued or running"""
+        with self._lock:
+            state = self._users.get(user_id)
+            return state is not None and (state.queued or state.running)
+
+    def _run(self):
+        while True:
+            user_id = self._jobs.get()
+            with self._lock:
+                state = self._state(user_id)
+                state.queued = False
+                state.running = True
+                state.dirty = False
+            try:
+                self._rebuild(user_id, state)
+            except Exception:
+                logger.exception("Radio pre-render failed for user %s", user_id)
+            with self._lock:
+                state.running = False
+                rerun = state.dirty
+                state.dirty = False
+            if rerun:
+                self.request_rebuild(user_id)
+
+    def _rebuild(self, user_id, state):
+        df = self.load_phrases(user_id)
+        segments = radio.episode_segments(df.head(self.phrases)) if not df.empty else []
+        signature = episode_signature(segments)
+        if state.episode is not None and state.episode.signature == signature:
+            return
+
+        needed = [(text, lang) for phrase_text, meaning_text in segments
+                  for text, lang in ((phrase_text, 'en'), (meaning_text, 'ja'))]
+        previous = state.segments
+        missing = [key for key in dict.fromkeys(needed) if key not in previous]
+        fresh = synthesize_many(self.synthesize, missing, workers=self.workers) if missing else {}
+        audio = {key: previous.get(key) or fresh[key] for key in needed}
+
+        assembler = EpisodeAssembler(self.gap_ms)
+        for phrase_text, meaning_text in segments:
+            en_data = audio[(phrase_text, 'en')]
+            assembler.add(phrase_text, [en_data, en_data, audio[(meaning_text, 'ja')]])
+        episode = Episode(
+            audio=assembler.to_bytes(),
+            seek_index=assembler.seek_index(),
+            signature=signature,
+            built_at=time.time(),
+            phrases=len(segments),
+            synthesized=len(missing),
+        )
+        with self._lock:
+            state.episode = episode
+            state.segments = audio  # drops segments of phrases no longer in the episode
@@ -0,0 +1,88 @@
+"""
+Per-user read-through cache for phrase queries.
+Entries expire after a TTL and the least recently used entry is evicted once
+the cache is full. Keys are grouped by user so a write can drop exactly that
+user's entries.
+"""
+#%%
+import threading
+import time
+from collections import OrderedDict
+
+#%%
+class QueryCache:
+    """Thread-safe TTL + LRU cache keyed by (user_id, query key)"""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # (user_id, key) -> (expires_at, value)
+        self._by_user = {}              # user_id -> set of keys
+        self._generation = {}           # user_id -> bumped on every invalidation
+        self._lock = threading.Lock()
+
+    def get_or_load(self, user_id, key, loader):
+        """Return the cached value, or call loader() and cache its result"""
+        full_key = (user_id, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation.get(user_id, 0)
+
+        # Load outside the lock so slow queries don't serialize other users
+        value = loader()
+
+        with self._lock:
+            if self._generation.get(user_id, 0) != generation:
+                # A write landed while we were loading; don't cache a stale result
+                return value
+            self._entries[full_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(full_key)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                (old_user, old_key), _ = self._entries.popitem(last=False)
+                self._discard_user_key(old_user, old_key)
+                self.evictions += 1
+        return value
+
+    def invalidate_user(self, user_id):
+        """Drop every cached entry belonging to user_id"""
+        with self._lock:
+            self._generation[user_id] = self._generation.get(user_id, 0) + 1
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop((user_id, key), None)
+
+    def clear(self):
+        """Drop everything (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+    def _discard_user_key(self, user_id, key):
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
@@ -0,0 +1,87 @@
+"""
+Radio Mode audio assembly: each phrase is read English x2 -> Japanese x1.
+Segments are synthesized on a bounded thread pool and reassembled in order by
+mp3.EpisodeAssembler (headers stripped, silence between segments, seek index).
+The text-to-speech call is injectable (synthesize(text, lang) -> mp3 bytes, e.g. a
+tts_engines engine's synthesize, optionally wrapped by the audio cache), so episodes
+can be built offline with the espeak or silent engine.
+"""
+#%%
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from mp3 import EpisodeAssembler
+from tts_engines import GTTSEngine, synthesize_many, synthesize_with_retry
+
+NO_MEANING = "意味なし"
+
+DEFAULT_WORKERS = 4      # concurrent TTS requests
+DEFAULT_GAP_MS = 600     # silence after every EN/EN/JA segment
+
+DEFAULT_ENGINE = GTTSEngine()
+
+#%%
+def episode_segments(df):
+    """Return [(phrase_text, meaning_text), ...] for df.
+    Text is stored normalized (normalize.py), so it is read out as is.
+    """
+    return [
+        (str(phrase), str(meaning) if meaning else NO_MEANING)
+        for phrase, meaning in zip(df['phrase'], df['meaning'])
+    ]
+
+#%%
+def build_indexed_episode(df, synthesize=DEFAULT_ENGINE.synthesize, on_progress=None,
+                          workers=DEFAULT_WORKERS, gap_ms=DEFAULT_GAP_MS):
+    """Return (mp3 bytes, seek index) with every row of df read as English x2 -> Japanese x1.
+    Segments are synthesized concurrently and then assembled in row order.
+    on_progress, if given, is called as on_progress(done, total, text) per finished segment.
+    The seek index lists {label, byte, seconds} for the start of each phrase.
+    """
+    segments = episode_segments(df)
+    requests = [(text, lang) for phrase_text, meaning_text in segments
+                for text, lang in ((phrase_text, 'en'), (meaning_text, 'ja'))]
+    audio = synthesize_many(synthesize, requests, workers=workers, on_done=on_progress)
+
+    assembler = EpisodeAssembler(gap_ms)
+    for phrase_text, meaning_text in segments:
+        en_data = audio[(phrase_text, 'en')]
+        assembler.add(phrase_text, [en_data, en_data, audio[(meaning_text, 'ja')]])
+    return assembler.to_bytes(), assembler.seek_index()
+
+def build_episode(df, synthesize=DEFAULT_ENGINE.synthesize, on_progress=None,
+                  workers=DEFAULT_WORKERS, gap_ms=DEFAULT_GAP_MS):
+    """Return one MP3 with every row of df read as English x2 -> Japanese x1"""
+    return build_indexed_episode(df, synthesize, on_progress, workers, gap_ms)[0]
+
+#%%
+def iter_episode(df, synthesize=DEFAULT_ENGINE.synthesize, workers=DEFAULT_WORKERS, lookahead=None,
+                 gap_ms=DEFAULT_GAP_MS):
+    """Yield the episode one phrase at a time (EN x2 + JA x1 frames) as soon as it is ready.
+    At most `lookahead` phrases (default 2 x workers) are synthesized ahead of the consumer,
+    so memory stays bounded however long the episode is.
+    """
+    lookahead = lookahead or workers * 2
+    segments = iter(episode_segments(df))
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(segment):
+        phrase_text, meaning_text = segment
+        return (
+            pool.submit(synthesize_with_retry, synthesize, phrase_text, 'en'),
+            pool.submit(synthesize_with_retry, synthesize, meaning_text, 'ja'),
+        )
+
+    try:
+        pending = deque(submit(segment) for _, segment in zip(range(lookahead), segments))
+        while pending:
+            en_future, ja_future = pending.popleft()
+            segment = next(segments, None)
+            if segment is not None:
+                pending.append(submit(segment))
+            en_data = en_future.result()
+            assembler = EpisodeAssembler(gap_ms)
+            assembler.add(None, [en_data, en_data, ja_future.result()])
+            yield assembler.to_bytes()
+    finally:
+        # Consumer went away (e.g. the player closed the connection): drop queued work
+        pool.shutdown(wait=False, cancel_futures=True)
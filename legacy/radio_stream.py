@@ -0,0 +1,88 @@
+"""
+Local HTTP endpoint that streams Radio Mode episodes.
+Instead of embedding the whole episode as a base64 data URI, views/radio_mode.py registers a
+generator factory and points an <audio> tag at /radio/<token>.mp3. The handler
+writes each MP3 segment as the generator yields it, so playback starts after the
+first phrase and only the generator's lookahead window is held in memory.
+"""
+#%%
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STREAM_TTL = 60 * 60    # seconds a registered episode stays playable
+MAX_STREAMS = 64        # oldest registrations are dropped beyond this
+
+#%%
+class RadioStreamServer:
+    """Serves registered episodes; each GET replays the episode from a fresh generator"""
+
+    def __init__(self, host="127.0.0.1", port=8765, public_url=None):
+        self.public_url = (public_url or f"http://{host}:{port}").rstrip("/")
+        self._streams = {}  # token -> (registered_at, factory)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def register(self, factory):
+        """Register factory() -> iterable of MP3 byte chunks; returns the URL to play"""
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._streams = {
+                t: entry for t, entry in self._streams.items() if now - entry[0] < STREAM_TTL
+            }
+            while len(self._streams) >= MAX_STREAMS:
+                del self._streams[next(iter(self._streams))]
+            self._streams[token] = (now, factory)
+        return f"{self.public_url}/radio/{token}.mp3"
+
+    def _factory(self, token):
+        with self._lock:
+            entry = self._streams.get(token)
+        if entry is None or time.monotonic() - entry[0] >= STREAM_TTL:
+            return None
+        return entry[1]
+
+    def shutdown(self):
+        self._server.shutdown()
+
+    def _handler_class(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.0 without Content-Length: the body ends when the connection closes
+            protocol_version = "HTTP/1.0"
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if not (path.startswith("/radio/") and path.endswith(".mp3")):
+                    self.send_error(404)
+                    return
+                factory = owner._factory(path[len("/radio/"):-len(".mp3")])
+                if factory is None:
+                    self.send_error(404, "Episode expired")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                chunks = factory()
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # player stopped or seeked away
+                finally:
+                    close = getattr(chunks, "close", None)
+                    if close is not None:
+                        close()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
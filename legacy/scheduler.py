@@ -0,0 +1,66 @@
+"""
+SM-2 spaced-repetition scheduling.
+Each phrase carries due_at / interval_days / ease / repetitions. Rating a card
+computes its next schedule here from the values the caller already has, so the
+backend only needs one UPDATE per rating.
+"""
+#%%
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# Review buttons -> SM-2 quality (0-5); below 3 counts as a lapse
+RATINGS = {
+    "again": 1,
+    "hard": 3,
+    "good": 4,
+    "easy": 5,
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # same text format as SQLite's CURRENT_TIMESTAMP (UTC)
+
+#%%
+def utc_now():
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+def format_timestamp(dt):
+    """UTC datetime -> 'YYYY-MM-DD HH:MM:SS'"""
+    return dt.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+def _value(card, key, default):
+    value = card.get(key, default) if hasattr(card, "get") else default
+    # Missing columns and NULLs (NaN in pandas) fall back to the default
+    return default if value is None or value != value else value
+
+#%%
+def next_schedule(card, quality, now=None):
+    """Return the new {due_at, interval_days, ease, repetitions} after rating card.
+    card is a row (dict or pandas Series) with the current schedule columns.
+    """
+    if not 0 <= quality <= 5:
+        raise ValueError("quality must be between 0 and 5")
+    now = now or utc_now()
+    repetitions = int(_value(card, "repetitions", 0))
+    interval = float(_value(card, "interval_days", 0))
+    ease = float(_value(card, "ease", DEFAULT_EASE))
+
+    if quality < 3:
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    return {
+        "due_at": format_timestamp(now + timedelta(days=interval)),
+        "interval_days": interval,
+        "ease": round(ease, 4),
+        "repetitions": repetitions,
+    }
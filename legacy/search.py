@@ -0,0 +1,167 @@
+"""
+Full-text search over phrases and meanings.
+Meanings are Japanese without spaces, so text is turned into index terms here and
+the backends only store and match those terms:
+
+- runs of kana/kanji become overlapping character bigrams plus the run's last
+  character ("朝飯前" -> "朝飯 飯前 前"), so any substring of 2+ characters is a
+  phrase query over adjacent bigrams and a single character is a prefix query
+- everything else is split into lowercase words, matched by prefix (no stemming,
+  so a half-typed word still finds its phrases)
+
+sqlite_backend keeps these terms in an FTS5 table; supabase_backend, which has no
+Japanese-aware full-text search, uses the in-memory InvertedIndex below.
+"""
+#%%
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+
+# Hiragana, katakana (incl. half-width) and CJK ideographs
+_CJK = r"\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f"
+# A run of kana/kanji, or a word of other letters/digits (kana and kanji are \w too,
+# so words exclude them: "800台" is the word "800" followed by the run "台")
+_TOKEN = re.compile(rf"([{_CJK}]+)|[^\W_{_CJK}]+(?:'[^\W_{_CJK}]+)*")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+#%%
+def _bigrams(run):
+    return list(map(str.__add__, run, run[1:]))
+
+def index_terms(text):
+    """Terms stored for a phrase or meaning, in text order"""
+    terms = []
+    for match in _TOKEN.finditer(str(text or "")):
+        run = match.group(1)
+        if run is None:
+            terms.append(match.group().lower())
+        else:
+            terms += _bigrams(run)
+            terms.append(run[-1])
+    return terms
+
+def index_text(text):
+    """index_terms joined by spaces: the column value for the FTS5 table"""
+    return " ".join(index_terms(text))
+
+def query_parts(query):
+    """Split a search box query into parts that must all match.
+    Each part is ("phrase", [bigrams]) for 2+ kana/kanji, ("prefix", term) for a
+    single character or an English word (matched as a prefix, for search-as-you-type).
+    """
+    parts = []
+    for match in _TOKEN.finditer(str(query or "")):
+        run = match.group(1)
+        if run is None:
+            parts.append(("prefix", match.group().lower()))
+        elif len(run) == 1:
+            parts.append(("prefix", run))
+        else:
+            parts.append(("phrase", _bigrams(run)))
+    return parts
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+def fts_query(query):
+    """FTS5 MATCH expression for a search box query, or None if it has no terms"""
+    expressions = []
+    for kind, value in query_parts(query):
+        if kind == "phrase":
+            expressions.append(_quote(" ".join(value)))
+        else:
+            expressions.append(_quote(value) + "*")
+    return " AND ".join(expressions) or None
+
+#%%
+class InvertedIndex:
+    """Incrementally maintained in-memory index with BM25 ranking.
+    add()/remove() keep it current as rows are written; search() matches every
+    query part (adjacent bigrams for Japanese, prefixes for words).
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # term -> {doc_id: [positions]}
+        self._docs = {}                     # doc_id -> term count
+        self._doc_terms = {}                # doc_id -> distinct terms, for remove()
+        self._vocabulary = []               # sorted terms, for prefix lookups
+        self._total_length = 0
+        self.last_id = 0                    # highest id added so far
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, *texts):
+        """Index (or re-index) a row from its text columns"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        terms = [term for text in texts for term in index_terms(text)]
+        for position, term in enumerate(terms):
+            postings = self._postings[term]
+            if not postings:
+                bisect.insort(self._vocabulary, term)
+            postings.setdefault(doc_id, []).append(position)
+        self._docs[doc_id] = len(terms)
+        self._doc_terms[doc_id] = set(terms)
+        self._total_length += len(terms)
+        self.last_id = max(self.last_id, doc_id)
+
+    def remove(self, doc_id):
+        length = self._docs.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def _prefix_matches(self, prefix):
+        """{doc_id: term frequency} over every term starting with prefix"""
+        matches = Counter()
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            for doc_id, positions in self._postings[term].items():
+                matches[doc_id] += len(positions)
+        return matches
+
+    def _phrase_matches(self, grams):
+        """{doc_id: occurrences} of grams at consecutive positions"""
+        first = self._postings.get(grams[0], {})
+        matches = Counter()
+        for doc_id, positions in first.items():
+            for start in positions:
+                if all(start + i in self._postings.get(g, {}).get(doc_id, ())
+                       for i, g in enumerate(grams[1:], 1)):
+                    matches[doc_id] += 1
+        return matches
+
+    def search(self, query, limit=50, offset=0):
+        """Return [(doc_id, score)] best first; every query part must match"""
+        parts = query_parts(query)
+        if not parts or not self._docs:
+            return []
+        average = self._total_length / len(self._docs)
+        scores = None
+        for kind, value in parts:
+            matches = self._phrase_matches(value) if kind == "phrase" else self._prefix_matches(value)
+            idf = math.log(1 + (len(self._docs) - len(matches) + 0.5) / (len(matches) + 0.5))
+            part_scores = {
+                doc_id: idf * tf * (BM25_K1 + 1)
+                / (tf + BM25_K1 * (1 - BM25_B + BM25_B * self._docs[doc_id] / average))
+                for doc_id, tf in matches.items()
+            }
+            if scores is None:
+                scores = part_scores
+            else:
+                scores = {d: s + part_scores[d] for d, s in scores.items() if d in part_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit]
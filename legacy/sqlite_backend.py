@@ -0,0 +1,440 @@
+"""
+Local SQLite storage backend.
+Implements the same functions as supabase_backend.py on top of the schema defined
+by migrations.py (legacy/phrases.db), so the app can run self-hosted or offline.
+
+- WAL journal so readers never block the writer
+- process-wide connection pool per database file: any thread (script runs, timers,
+  prefetch and executor threads) checks a connection out for one call and returns it
+- schema_version checked once per database file and process, not per connection
+- fixed SQL strings, compiled once per connection by sqlite3's statement cache
+- composite indexes matching the app's access paths
+- unique (user_id, content_hash) index so imports are idempotent upserts
+- (user_id, is_learned, due_at) index so "next N due reviews" is one index range scan
+- FTS5 table over search.index_text() of phrase/meaning, kept in sync incrementally:
+  new rows are indexed by id watermark after each write (once per import), deletes
+  by trigger
+- MinHash signature (near_duplicates.py) stored per phrase at write time as a BLOB
+- canonical video id and deep link (youtube.py) stored at write time, with a
+  (user_id, video_id, timestamp) index so a video's phrases are one ordered range scan
+"""
+#%%
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+import importer
+import migrations
+import near_duplicates
+import scheduler
+import search
+import youtube
+from auth import hash_password
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrases.db")
+
+IMPORT_CHUNK_SIZE = 5000
+POOL_SIZE = 8  # idle connections kept per database file
+
+_pools = {}  # db path -> LifoQueue of idle connections
+_initialized = set()  # db paths whose schema this process has checked
+_pool_lock = threading.Lock()
+_init_lock = threading.Lock()
+
+#%%
+PHRASE_COLUMNS = (
+    "id, user_id, phrase, meaning, youtube_url, timestamp, is_learned, created_at, "
+    "due_at, interval_days, ease, repetitions, video_id, video_link"
+)
+
+SQL_INSERT_USER = "INSERT INTO users (username, password_hash) VALUES (?, ?)"
+SQL_AUTHENTICATE = "SELECT id FROM users WHERE username = ? AND password_hash = ?"
+SQL_INSERT_PHRASE = (
+    "INSERT INTO phrases "
+    "(user_id, phrase, meaning, youtube_url, timestamp, content_hash, minhash, "
+    "video_id, video_link, due_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (user_id, content_hash) DO NOTHING"
+)
+SQL_MERGE_PHRASE = (
+    "INSERT INTO phrases "
+    "(user_id, phrase, meaning, youtube_url, timestamp, content_hash, minhash, "
+    "video_id, video_link, due_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (user_id, content_hash) DO UPDATE SET "
+    "youtube_url = excluded.youtube_url, timestamp = excluded.timestamp, "
+    "video_id = excluded.video_id, video_link = excluded.video_link"
+)
+SQL_LAST_ID = "SELECT MAX(id) FROM phrases"
+SQL_COUNT_AFTER = "SELECT COUNT(*) FROM phrases WHERE id > ?"
+SQL_UNLEARNED = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND is_learned = 0 ORDER BY created_at, id"
+)
+SQL_ALL = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? ORDER BY created_at DESC, id DESC"
+)
+SQL_UNLEARNED_PAGE_FIRST = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND is_learned = 0 ORDER BY created_at, id LIMIT ?"
+)
+SQL_UNLEARNED_PAGE_AFTER = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND is_learned = 0 AND (created_at, id) > (?, ?) "
+    "ORDER BY created_at, id LIMIT ?"
+)
+SQL_ALL_PAGE_FIRST = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+SQL_ALL_PAGE_AFTER = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND (created_at, id) < (?, ?) "
+    "ORDER BY created_at DESC, id DESC LIMIT ?"
+)
+SQL_DUE = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND is_learned = 0 AND due_at <= ? ORDER BY due_at, id LIMIT ?"
+)
+SQL_RATE = (
+    "UPDATE phrases SET due_at = ?, interval_days = ?, ease = ?, repetitions = ? "
+    "WHERE id = ? AND user_id = ?"
+)
+SQL_VIDEOS = (
+    "SELECT video_id, COUNT(*) AS phrases, MIN(created_at) AS first_added "
+    "FROM phrases WHERE user_id = ? AND video_id != '' "
+    "GROUP BY video_id ORDER BY first_added DESC, video_id"
+)
+SQL_VIDEO_PHRASES = (
+    f"SELECT {PHRASE_COLUMNS} FROM phrases "
+    "WHERE user_id = ? AND video_id = ? ORDER BY timestamp, id"
+)
+SQL_FTS_LAST_ID = "SELECT rowid FROM phrases_fts ORDER BY rowid DESC LIMIT 1"
+# index_text is search.index_text, registered on the connection by sync_search_index
+SQL_FTS_INDEX_NEW = (
+    "INSERT INTO phrases_fts (rowid, phrase, meaning) "
+    "SELECT id, index_text(phrase), index_text(meaning) FROM phrases WHERE id > ?"
+)
+SQL_SEARCH = (
+    f"SELECT {', '.join('p.' + c.strip() for c in PHRASE_COLUMNS.split(','))}, "
+    "bm25(phrases_fts, 2.0, 1.0) AS score "
+    "FROM phrases_fts JOIN phrases p ON p.id = phrases_fts.rowid "
+    "WHERE phrases_fts MATCH ? AND p.user_id = ? "
+    "ORDER BY score, p.id LIMIT ? OFFSET ?"
+)
+SQL_SIGNATURES = (
+    "SELECT id, phrase, meaning, youtube_url, timestamp, is_learned, created_at, minhash "
+    "FROM phrases WHERE user_id = ? ORDER BY id"
+)
+SQL_MERGE_SOURCE = (
+    "SELECT youtube_url, timestamp, is_learned FROM phrases WHERE id = ? AND user_id = ?"
+)
+SQL_MERGE_INTO = (
+    "UPDATE phrases SET youtube_url = ?, timestamp = ?, video_id = ?, video_link = ?, "
+    "is_learned = ? WHERE id = ? AND user_id = ?"
+)
+SQL_MARK_LEARNED = "UPDATE phrases SET is_learned = 1 WHERE id = ? AND user_id = ?"
+SQL_CLEAR = "DELETE FROM phrases WHERE user_id = ?"
+SQL_DELETE = "DELETE FROM phrases WHERE id = ? AND user_id = ?"
+SQL_RESET = (
+    "UPDATE phrases SET is_learned = 0, due_at = CURRENT_TIMESTAMP, interval_days = 0, "
+    f"ease = {scheduler.DEFAULT_EASE}, repetitions = 0 WHERE user_id = ?"
+)
+SQL_DELETE_LEARNED = "DELETE FROM phrases WHERE user_id = ? AND is_learned = 1"
+
+#%%
+def configure(path):
+    """Point the backend at another database file (connections are reopened lazily)"""
+    global DB_PATH
+    DB_PATH = path
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=30, cached_statements=256, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if path not in _initialized:
+        with _init_lock:  # first connection to a file checks its schema, once
+            if path not in _initialized:
+                try:
+                    initialize(conn)
+                except Exception:
+                    conn.close()
+                    raise
+                _initialized.add(path)
+    return conn
+
+def _pool(path):
+    with _pool_lock:
+        return _pools.setdefault(path, queue.LifoQueue(maxsize=POOL_SIZE))
+
+@contextmanager
+def connection():
+    """Check out a pooled connection to DB_PATH for the duration of the block.
+    Cursors must be consumed inside the block; the connection then goes back to the
+    pool (or is closed when POOL_SIZE connections are already idle)."""
+    path = DB_PATH
+    pool = _pool(path)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open(path)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def initialize(conn):
+    """Check conn's schema (migrations.ensure_current: a new database is created, an
+    outdated one raises migrations.SchemaError) and catch up the search index.
+    Also used by scripts that open their own connection (scripts/sync_db.py)."""
+    migrations.ensure_current(conn)
+    with conn:
+        sync_search_index(conn)
+
+def sync_search_index(conn):
+    """Index phrases added since the last sync (ids only grow: AUTOINCREMENT) with one
+    INSERT ... SELECT over the new id range. Called inside a writing transaction, so no
+    other writer can slip in between; bulk writers call it once after their last chunk."""
+    conn.create_function("index_text", 1, search.index_text, deterministic=True)
+    row = conn.execute(SQL_FTS_LAST_ID).fetchone()
+    conn.execute(SQL_FTS_INDEX_NEW, (row[0] if row else 0,))
+
+def close_connections():
+    """Close every idle pooled connection (connections in use are closed on return)"""
+    with _pool_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+def _to_frame(cursor):
+    """Build a DataFrame shaped like the Supabase result (is_learned as bool)"""
+    rows = cursor.fetchall()
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description])
+    df["is_learned"] = df["is_learned"].astype(bool)
+    return df
+
+#%%
+def create_user(username, password):
+    """Create a new user account"""
+    try:
+        with connection() as conn, conn:
+            conn.execute(SQL_INSERT_USER, (username, hash_password(password)))
+        return True, "Account created successfully!"
+    except sqlite3.IntegrityError:
+        return False, "Username already exists."
+    except Exception as e:
+        return False, f"Error: {e}"
+
+#%%
+def authenticate_user(username, password):
+    """Authenticate user and return user_id if successful"""
+    with connection() as conn:
+        row = conn.execute(SQL_AUTHENTICATE, (username, hash_password(password))).fetchone()
+    if row:
+        return True, row[0]
+    else:
+        return False, None
+
+#%%
+def add_phrase(user_id, phrase, meaning, youtube_url, timestamp=0):
+    """Add a phrase for a specific user.
+    Returns False when the user already has the phrase (nothing is written)."""
+    youtube_url = youtube_url or ""
+    with connection() as conn, conn:
+        inserted = conn.execute(SQL_INSERT_PHRASE, (
+            user_id, phrase, meaning, youtube_url, timestamp,
+            importer.content_hash(phrase, meaning), near_duplicates.signature_blob(phrase),
+            youtube.video_id(youtube_url), youtube.deep_link(youtube_url, timestamp),
+        )).rowcount == 1
+        if inserted:
+            sync_search_index(conn)
+    return inserted
+
+#%%
+def get_unlearned_phrases(user_id):
+    """Get unlearned phrases for a specific user"""
+    with connection() as conn:
+        return _to_frame(conn.execute(SQL_UNLEARNED, (user_id,)))
+
+#%%
+def get_all_phrases(user_id):
+    """Get all phrases for a specific user"""
+    with connection() as conn:
+        return _to_frame(conn.execute(SQL_ALL, (user_id,)))
+
+#%%
+def _page(first_sql, after_sql, user_id, cursor, page_size):
+    """Run one keyset page query and return (DataFrame, next_cursor)"""
+    with connection() as conn:
+        if cursor is None:
+            df = _to_frame(conn.execute(first_sql, (user_id, page_size)))
+        else:
+            df = _to_frame(conn.execute(after_sql, (user_id, cursor[0], cursor[1], page_size)))
+    if len(df) < page_size:
+        return df, None
+    last = df.iloc[-1]
+    return df, (last["created_at"], int(last["id"]))
+
+def get_unlearned_phrases_page(user_id, cursor=None, page_size=50):
+    """Get one page of unlearned phrases ordered by (created_at, id).
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    return _page(SQL_UNLEARNED_PAGE_FIRST, SQL_UNLEARNED_PAGE_AFTER, user_id, cursor, page_size)
+
+def get_all_phrases_page(user_id, cursor=None, page_size=50):
+    """Get one page of all phrases, newest first by (created_at, id).
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    return _page(SQL_ALL_PAGE_FIRST, SQL_ALL_PAGE_AFTER, user_id, cursor, page_size)
+
+#%%
+def search_phrases(user_id, query, cursor=None, page_size=50):
+    """Full-text search over phrase and meaning, best match first (BM25, phrase
+    weighted double). cursor is the offset of the page; returns (DataFrame, next_cursor).
+    """
+    expression = search.fts_query(query)
+    if expression is None:
+        return pd.DataFrame(), None
+    offset = cursor or 0
+    with connection() as conn:
+        df = _to_frame(conn.execute(SQL_SEARCH, (expression, user_id, page_size + 1, offset)))
+    if len(df) <= page_size:
+        return df, None
+    return df.iloc[:page_size], offset + page_size
+
+#%%
+def get_due_phrases(user_id, limit=50, now=None):
+    """Get the next `limit` unlearned phrases whose review is due, most overdue first"""
+    now = scheduler.format_timestamp(now or scheduler.utc_now())
+    with connection() as conn:
+        return _to_frame(conn.execute(SQL_DUE, (user_id, now, limit)))
+
+def update_schedule(phrase_id, user_id, schedule):
+    """Store a phrase's new SM-2 schedule (one UPDATE)"""
+    with connection() as conn, conn:
+        conn.execute(SQL_RATE, (
+            schedule["due_at"], schedule["interval_days"], schedule["ease"],
+            schedule["repetitions"], int(phrase_id), user_id,
+        ))
+
+#%%
+def get_videos(user_id):
+    """The user's videos: video_id, phrases (count), first_added; newest first"""
+    with connection() as conn:
+        cursor = conn.execute(SQL_VIDEOS, (user_id,))
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+
+def get_video_phrases(user_id, video_id):
+    """All of the user's phrases from one video, in timestamp order (one index range scan)"""
+    with connection() as conn:
+        return _to_frame(conn.execute(SQL_VIDEO_PHRASES, (user_id, video_id)))
+
+#%%
+def get_phrase_signatures(user_id):
+    """All of a user's phrases with their stored MinHash signature (bytes), by id"""
+    with connection() as conn:
+        return _to_frame(conn.execute(SQL_SIGNATURES, (user_id,)))
+
+def merge_phrases(keep_id, drop_ids, user_id):
+    """Merge near-duplicates into keep_id (see near_duplicates.merged_fields) and
+    delete drop_ids, in one transaction"""
+    ids = [int(keep_id)] + [int(i) for i in drop_ids]
+    with connection() as conn, conn:
+        rows = [conn.execute(SQL_MERGE_SOURCE, (i, user_id)).fetchone() for i in ids]
+        if rows[0] is None:
+            return
+        fields = near_duplicates.merged_fields([
+            {"youtube_url": r[0], "timestamp": r[1], "is_learned": r[2]} for r in rows if r
+        ])
+        conn.execute(SQL_MERGE_INTO, (
+            fields["youtube_url"], fields["timestamp"], fields["video_id"], fields["video_link"],
+            int(fields["is_learned"]), ids[0], user_id,
+        ))
+        conn.executemany(SQL_DELETE, [(i, user_id) for i in ids[1:]])
+
+#%%
+def mark_as_learned(phrase_id, user_id):
+    """Mark a phrase as learned (with user verification)"""
+    with connection() as conn, conn:
+        conn.execute(SQL_MARK_LEARNED, (int(phrase_id), user_id))
+
+def mark_many_as_learned(phrase_ids, user_id):
+    """Mark several phrases as learned in one transaction"""
+    with connection() as conn, conn:
+        conn.executemany(SQL_MARK_LEARNED, [(int(i), user_id) for i in phrase_ids])
+
+#%%
+def import_phrases_from_df(user_id, df, progress=None, on_duplicate="skip"):
+    """Imports phrases from a pandas DataFrame for a specific user.
+    Expected columns: 'phrase', 'meaning'
+    Phrases already stored for the user are skipped (or merged, keeping is_learned).
+    Returns an importer.ImportReport.
+    """
+    if on_duplicate not in importer.ON_DUPLICATE:
+        raise ValueError(f"on_duplicate must be one of {importer.ON_DUPLICATE}")
+    records = importer.prepare_records(df)
+    records.insert(0, "user_id", user_id)
+    sql = SQL_MERGE_PHRASE if on_duplicate == "merge" else SQL_INSERT_PHRASE
+
+    with connection() as conn:
+        def insert_chunk(chunk):
+            # One transaction per chunk; rows hitting the unique index don't count as inserted
+            rows = chunk.itertuples(index=False, name=None)
+            with conn:
+                if on_duplicate != "merge":
+                    return conn.executemany(sql, rows).rowcount
+                # rowcount would include merged rows: count the new ids instead
+                last_id = conn.execute(SQL_LAST_ID).fetchone()[0] or 0
+                conn.executemany(sql, rows)
+                return conn.execute(SQL_COUNT_AFTER, (last_id,)).fetchone()[0]
+
+        report = importer.run_import(
+            records, insert_chunk, chunk_size=IMPORT_CHUNK_SIZE, progress=progress, total=len(df)
+        )
+        with conn:  # search terms for every imported row, in one pass after the last chunk
+            sync_search_index(conn)
+        return report
+
+#%%
+def clear_all_phrases(user_id):
+    """Deletes all phrases for a specific user (Use with caution)."""
+    with connection() as conn, conn:
+        conn.execute(SQL_CLEAR, (user_id,))
+
+#%%
+def delete_phrase(phrase_id, user_id):
+    """Delete a phrase (with user verification)"""
+    with connection() as conn, conn:
+        conn.execute(SQL_DELETE, (int(phrase_id), user_id))
+
+def delete_phrases(phrase_ids, user_id):
+    """Delete several phrases in one transaction"""
+    with connection() as conn, conn:
+        conn.executemany(SQL_DELETE, [(int(i), user_id) for i in phrase_ids])
+
+#%%
+def reset_all_progress(user_id):
+    """Resets 'is_learned' to False and the review schedule for all phrases of a specific user."""
+    with connection() as conn, conn:
+        conn.execute(SQL_RESET, (user_id,))
+
+#%%
+def delete_learned_phrases(user_id):
+    """Deletes all phrases marked as learned for a specific user."""
+    with connection() as conn, conn:
+        conn.execute(SQL_DELETE_LEARNED, (user_id,))
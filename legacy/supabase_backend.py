@@ -0,0 +1,475 @@
+"""
+Supabase (hosted) storage backend.
+Implements the same functions as sqlite_backend.py; select one via database.py.
+
+Idempotent imports need a content hash column with a unique index. Existing rows
+must be hashed in between (NULL hashes never conflict, so re-importing them would
+duplicate them); the script also reports duplicates that would block the index:
+
+    alter table phrases add column if not exists content_hash text;
+    -- python scripts/backfill_supabase.py
+    create unique index if not exists idx_phrases_user_content_hash
+        on phrases (user_id, content_hash);
+
+Spaced repetition (scheduler.py) needs the SM-2 schedule columns and the due-queue index:
+
+    alter table phrases
+        add column if not exists due_at timestamptz default now(),
+        add column if not exists interval_days real default 0,
+        add column if not exists ease real default 2.5,
+        add column if not exists repetitions integer default 0;
+    update phrases set due_at = created_at where due_at is null;
+    create index if not exists idx_phrases_user_learned_due
+        on phrases (user_id, is_learned, due_at);
+
+Near-duplicate detection (near_duplicates.py) stores each phrase's MinHash signature
+as hex text (written by add_phrase and imports; missing ones are computed on read):
+
+    alter table phrases add column if not exists minhash text;
+
+Per-video views (youtube.py) need the canonical video id and precomputed deep link,
+written by add_phrase and imports, and an index for "this video's phrases in order":
+
+    alter table phrases
+        add column if not exists video_id text default '',
+        add column if not exists video_link text;
+    create index if not exists idx_phrases_user_video
+        on phrases (user_id, video_id, timestamp);
+
+Existing rows get both from scripts/backfill_supabase.py (the content_hash backfill
+above fills in video ids and links in the same pass); until then, cards without a
+stored video_link fall back to youtube.deep_link.
+
+Search uses an in-memory search.InvertedIndex per user: built on the first search,
+then caught up with rows whose id is above the last indexed one and told about
+deletes made through this module.
+"""
+#%%
+import threading
+import streamlit as st
+import pandas as pd
+from supabase import create_client
+import importer
+import near_duplicates
+import scheduler
+import search
+import youtube
+from auth import hash_password
+
+FETCH_SIZE = 1000  # rows per request when reading a whole table (the API's default cap)
+
+# Columns returned by phrase reads, the same as sqlite_backend.PHRASE_COLUMNS: never
+# minhash/content_hash, which only the near-duplicate scan and imports use
+PHRASE_COLUMNS = (
+    "id, user_id, phrase, meaning, youtube_url, timestamp, is_learned, created_at, "
+    "due_at, interval_days, ease, repetitions, video_id, video_link"
+)
+
+_search_indexes = {}  # user_id -> search.InvertedIndex
+_search_lock = threading.Lock()
+
+#%%
+@st.cache_resource
+def get_supabase_client():
+    """Initialize and return Supabase client (cached)"""
+    url = st.secrets["supabase"]["url"]
+    key = st.secrets["supabase"]["key"]
+    return create_client(url, key)
+
+#%%
+def create_user(username, password):
+    """Create a new user account"""
+    supabase = get_supabase_client()
+    try:
+        password_hash = hash_password(password)
+        result = supabase.table("users").insert({
+            "username": username,
+            "password_hash": password_hash
+        }).execute()
+        return True, "Account created successfully!"
+    except Exception as e:
+        if "duplicate key" in str(e) or "unique" in str(e).lower():
+            return False, "Username already exists."
+        return False, f"Error: {e}"
+
+#%%
+def authenticate_user(username, password):
+    """Authenticate user and return user_id if successful"""
+    supabase = get_supabase_client()
+    password_hash = hash_password(password)
+    result = supabase.table("users").select("id").eq(
+        "username", username
+    ).eq(
+        "password_hash", password_hash
+    ).execute()
+    
+    if result.data:
+        return True, result.data[0]["id"]
+    else:
+        return False, None
+
+#%%
+def add_phrase(user_id, phrase, meaning, youtube_url, timestamp=0):
+    """Add a phrase for a specific user.
+    Returns False when the user already has the phrase (nothing is written)."""
+    supabase = get_supabase_client()
+    youtube_url = youtube_url or ""
+    result = supabase.table("phrases").upsert({
+        "user_id": user_id,
+        "phrase": phrase,
+        "meaning": meaning,
+        "youtube_url": youtube_url,
+        "timestamp": timestamp,
+        "video_id": youtube.video_id(youtube_url),
+        "video_link": youtube.deep_link(youtube_url, timestamp),
+        "content_hash": importer.content_hash(phrase, meaning),
+        "minhash": near_duplicates.signature_blob(phrase).hex(),
+    }, on_conflict="user_id,content_hash", ignore_duplicates=True).execute()
+    # Ignored duplicates are not returned
+    return bool(result.data)
+
+#%%
+def get_unlearned_phrases(user_id):
+    """Get unlearned phrases for a specific user"""
+    supabase = get_supabase_client()
+    result = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    ).eq(
+        "is_learned", False
+    ).execute()
+    
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    return df
+
+#%%
+def get_all_phrases(user_id):
+    """Get all phrases for a specific user"""
+    supabase = get_supabase_client()
+    result = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    ).order(
+        "created_at", desc=True
+    ).execute()
+    
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    return df
+
+#%%
+def _page(query, cursor, page_size, desc):
+    """Apply keyset filter/order/limit to a query and return (DataFrame, next_cursor)"""
+    if cursor is not None:
+        op = "lt" if desc else "gt"
+        created_at, last_id = cursor
+        query = query.or_(
+            f'created_at.{op}."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.{op}.{last_id})'
+        )
+    result = query.order(
+        "created_at", desc=desc
+    ).order(
+        "id", desc=desc
+    ).limit(page_size).execute()
+
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    if len(df) < page_size:
+        return df, None
+    last = df.iloc[-1]
+    return df, (last["created_at"], int(last["id"]))
+
+def get_unlearned_phrases_page(user_id, cursor=None, page_size=50):
+    """Get one page of unlearned phrases ordered by (created_at, id).
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    supabase = get_supabase_client()
+    query = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    ).eq(
+        "is_learned", False
+    )
+    return _page(query, cursor, page_size, desc=False)
+
+def get_all_phrases_page(user_id, cursor=None, page_size=50):
+    """Get one page of all phrases, newest first by (created_at, id).
+    Returns (DataFrame, next_cursor); next_cursor is None on the last page.
+    """
+    supabase = get_supabase_client()
+    query = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    )
+    return _page(query, cursor, page_size, desc=True)
+
+#%%
+def _search_index(user_id):
+    """This user's search index, caught up with phrases added since the last search"""
+    supabase = get_supabase_client()
+    with _search_lock:
+        index = _search_indexes.setdefault(user_id, search.InvertedIndex())
+        while True:
+            result = supabase.table("phrases").select("id, phrase, meaning").eq(
+                "user_id", user_id
+            ).gt(
+                "id", index.last_id
+            ).order(
+                "id"
+            ).limit(FETCH_SIZE).execute()
+            for row in result.data:
+                index.add(row["id"], row["phrase"], row["meaning"])
+            if len(result.data) < FETCH_SIZE:
+                return index
+
+def _forget_search(user_id, phrase_ids=None):
+    """Drop deleted phrases from the search index (all of the user's when ids is None)"""
+    with _search_lock:
+        if phrase_ids is None:
+            _search_indexes.pop(user_id, None)
+        elif user_id in _search_indexes:
+            for phrase_id in phrase_ids:
+                _search_indexes[user_id].remove(int(phrase_id))
+
+def search_phrases(user_id, query, cursor=None, page_size=50):
+    """Full-text search over phrase and meaning, best match first (BM25).
+    cursor is the offset of the page; returns (DataFrame, next_cursor).
+    """
+    offset = cursor or 0
+    ranked = _search_index(user_id).search(query, limit=page_size + 1, offset=offset)
+    if not ranked:
+        return pd.DataFrame(), None
+    page = ranked[:page_size]
+    supabase = get_supabase_client()
+    result = supabase.table("phrases").select(PHRASE_COLUMNS).in_(
+        "id", [doc_id for doc_id, _ in page]
+    ).eq(
+        "user_id", user_id
+    ).execute()
+
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    if df.empty:
+        return df, None
+    scores = dict(page)
+    # Lower is better, like SQLite's bm25()
+    df = df.assign(score=-df["id"].map(scores)).sort_values(["score", "id"]).reset_index(drop=True)
+    return df, (offset + page_size if len(ranked) > page_size else None)
+
+#%%
+def get_due_phrases(user_id, limit=50, now=None):
+    """Get the next `limit` unlearned phrases whose review is due, most overdue first"""
+    supabase = get_supabase_client()
+    now = scheduler.format_timestamp(now or scheduler.utc_now())
+    result = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    ).eq(
+        "is_learned", False
+    ).lte(
+        "due_at", now
+    ).order(
+        "due_at"
+    ).order(
+        "id"
+    ).limit(limit).execute()
+
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    return df
+
+def update_schedule(phrase_id, user_id, schedule):
+    """Store a phrase's new SM-2 schedule (one request)"""
+    supabase = get_supabase_client()
+    supabase.table("phrases").update(
+        dict(schedule)
+    ).eq(
+        "id", phrase_id
+    ).eq(
+        "user_id", user_id
+    ).execute()
+
+#%%
+def get_videos(user_id):
+    """The user's videos: video_id, phrases (count), first_added; newest first"""
+    supabase = get_supabase_client()
+    rows = []
+    while True:
+        result = supabase.table("phrases").select("id, video_id, created_at").eq(
+            "user_id", user_id
+        ).neq(
+            "video_id", ""
+        ).gt(
+            "id", rows[-1]["id"] if rows else 0
+        ).order(
+            "id"
+        ).limit(FETCH_SIZE).execute()
+        rows += result.data
+        if len(result.data) < FETCH_SIZE:
+            break
+
+    if not rows:
+        return pd.DataFrame(columns=["video_id", "phrases", "first_added"])
+    return pd.DataFrame(rows).groupby("video_id", as_index=False).agg(
+        phrases=("id", "size"), first_added=("created_at", "min")
+    ).sort_values(["first_added", "video_id"], ascending=[False, True]).reset_index(drop=True)
+
+def get_video_phrases(user_id, video_id):
+    """All of the user's phrases from one video, in timestamp order (one indexed query)"""
+    supabase = get_supabase_client()
+    result = supabase.table("phrases").select(PHRASE_COLUMNS).eq(
+        "user_id", user_id
+    ).eq(
+        "video_id", video_id
+    ).order(
+        "timestamp"
+    ).order(
+        "id"
+    ).execute()
+
+    df = pd.DataFrame(result.data) if result.data else pd.DataFrame()
+    return df
+
+#%%
+def get_phrase_signatures(user_id):
+    """All of a user's phrases with their stored MinHash signature (bytes), by id"""
+    supabase = get_supabase_client()
+    rows = []
+    while True:
+        result = supabase.table("phrases").select(
+            "id, phrase, meaning, youtube_url, timestamp, is_learned, created_at, minhash"
+        ).eq(
+            "user_id", user_id
+        ).gt(
+            "id", rows[-1]["id"] if rows else 0
+        ).order(
+            "id"
+        ).limit(FETCH_SIZE).execute()
+        rows += result.data
+        if len(result.data) < FETCH_SIZE:
+            break
+
+    df = pd.DataFrame(rows) if rows else pd.DataFrame()
+    if not df.empty:
+        df["minhash"] = df["minhash"].map(lambda h: bytes.fromhex(h) if h else None)
+    return df
+
+def merge_phrases(keep_id, drop_ids, user_id):
+    """Merge near-duplicates into keep_id (see near_duplicates.merged_fields) and
+    delete drop_ids"""
+    supabase = get_supabase_client()
+    ids = [int(keep_id)] + [int(i) for i in drop_ids]
+    result = supabase.table("phrases").select(
+        "id, youtube_url, timestamp, is_learned"
+    ).in_(
+        "id", ids
+    ).eq(
+        "user_id", user_id
+    ).execute()
+    rows = {row["id"]: row for row in result.data}
+    if ids[0] not in rows:
+        return
+    supabase.table("phrases").update(
+        near_duplicates.merged_fields([rows[i] for i in ids if i in rows])
+    ).eq(
+        "id", ids[0]
+    ).eq(
+        "user_id", user_id
+    ).execute()
+    delete_phrases(ids[1:], user_id)
+
+#%%
+def mark_as_learned(phrase_id, user_id):
+    """Mark a phrase as learned (with user verification)"""
+    supabase = get_supabase_client()
+    supabase.table("phrases").update(
+        {"is_learned": True}
+    ).eq(
+        "id", phrase_id
+    ).eq(
+        "user_id", user_id
+    ).execute()
+
+def mark_many_as_learned(phrase_ids, user_id):
+    """Mark several phrases as learned in one request"""
+    supabase = get_supabase_client()
+    supabase.table("phrases").update(
+        {"is_learned": True}
+    ).in_(
+        "id", list(phrase_ids)
+    ).eq(
+        "user_id", user_id
+    ).execute()
+
+#%%
+def import_phrases_from_df(user_id, df, progress=None, on_duplicate="skip"):
+    """Imports phrases from a pandas DataFrame for a specific user.
+    Expected columns: 'phrase', 'meaning'
+    Phrases already stored for the user are skipped (or merged, keeping is_learned).
+    Returns an importer.ImportReport.
+    """
+    if on_duplicate not in importer.ON_DUPLICATE:
+        raise ValueError(f"on_duplicate must be one of {importer.ON_DUPLICATE}")
+    records = importer.prepare_records(df)
+    records.insert(0, "user_id", user_id)
+    records["minhash"] = records["minhash"].map(bytes.hex)  # JSON has no bytes
+    supabase = get_supabase_client()
+
+    def insert_chunk(chunk):
+        # Bulk upsert against the unique (user_id, content_hash) index; is_learned is
+        # not sent, so merged rows keep their progress
+        result = supabase.table("phrases").upsert(
+            chunk.to_dict("records"),
+            on_conflict="user_id,content_hash",
+            ignore_duplicates=(on_duplicate == "skip"),
+        ).execute()
+        # With ignore_duplicates only newly inserted rows come back
+        return len(result.data) if on_duplicate == "skip" else None
+
+    # Chunked so large CSVs stay under the request size limit
+    return importer.run_import(records, insert_chunk, progress=progress, total=len(df))
+
+#%%
+def clear_all_phrases(user_id):
+    """Deletes all phrases for a specific user (Use with caution)."""
+    supabase = get_supabase_client()
+    supabase.table("phrases").delete().eq("user_id", user_id).execute()
+    _forget_search(user_id)
+
+#%%
+def delete_phrase(phrase_id, user_id):
+    """Delete a phrase (with user verification)"""
+    supabase = get_supabase_client()
+    supabase.table("phrases").delete().eq(
+        "id", phrase_id
+    ).eq(
+        "user_id", user_id
+    ).execute()
+    _forget_search(user_id, [phrase_id])
+
+def delete_phrases(phrase_ids, user_id):
+    """Delete several phrases in one request"""
+    supabase = get_supabase_client()
+    supabase.table("phrases").delete().in_(
+        "id", list(phrase_ids)
+    ).eq(
+        "user_id", user_id
+    ).execute()
+    _forget_search(user_id, phrase_ids)
+
+#%%
+def reset_all_progress(user_id):
+    """Resets 'is_learned' to False and the review schedule for all phrases of a specific user."""
+    supabase = get_supabase_client()
+    supabase.table("phrases").update({
+        "is_learned": False,
+        "due_at": scheduler.format_timestamp(scheduler.utc_now()),
+        "interval_days": 0,
+        "ease": scheduler.DEFAULT_EASE,
+        "repetitions": 0,
+    }).eq(
+        "user_id", user_id
+    ).execute()
+
+#%%
+def delete_learned_phrases(user_id):
+    """Deletes all phrases marked as learned for a specific user."""
+    supabase = get_supabase_client()
+    supabase.table("phrases").delete().eq(
+        "is_learned", True
+    ).eq(
+        "user_id", user_id
+    ).execute()
+    _forget_search(user_id)
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importer  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "import.db")
+    sqlite_backend.configure(path)
+    sqlite_backend.create_user("importer", "pw")
+    return path
+
+
+def phrases(path):
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(
+            "SELECT phrase, meaning, youtube_url, timestamp, is_learned, video_id FROM phrases "
+            "ORDER BY id", conn,
+        )
+    finally:
+        conn.close()
+
+
+def first_id(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT id FROM phrases ORDER BY id LIMIT 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_content_hash_ignores_case_width_and_spacing():
+    assert importer.content_hash("Good  morning", "おはよう") == \
+        importer.content_hash("good morning ", "おはよう")
+    assert importer.content_hash("ＡＢＣ", "x") == importer.content_hash("abc", "x")
+    assert importer.content_hash("Good morning", "おはよう") != \
+        importer.content_hash("Good morning", "おはようございます")
+
+
+def test_duplicates_in_the_file_and_in_the_table_are_skipped(db_path):
+    df = pd.DataFrame({
+        "phrase": ["See you later", "see  you later", "Take care"],
+        "meaning": ["またね", "またね", "気をつけて"],
+    })
+    report = sqlite_backend.import_phrases_from_df(1, df)
+    assert (report.total, report.inserted, report.skipped, report.failed) == (3, 2, 1, 0)
+
+    report = sqlite_backend.import_phrases_from_df(1, df)
+    assert (report.inserted, report.skipped) == (0, 3)
+    assert phrases(db_path)["phrase"].tolist() == ["See you later", "Take care"]
+
+
+def test_merge_updates_the_video_and_keeps_is_learned(db_path):
+    sqlite_backend.import_phrases_from_df(1, pd.DataFrame({
+        "phrase": ["See you later"], "meaning": ["またね"],
+        "youtube_url": ["https://youtu.be/aaaaaaaaaaa"], "timestamp": [10],
+    }))
+    sqlite_backend.mark_as_learned(first_id(db_path), 1)
+
+    report = sqlite_backend.import_phrases_from_df(1, pd.DataFrame({
+        "phrase": ["see you later"], "meaning": ["またね"],
+        "youtube_url": ["https://www.youtube.com/watch?v=bbbbbbbbbbb"], "timestamp": [42],
+    }), on_duplicate="merge")
+
+    assert (report.inserted, report.skipped) == (0, 1)
+    row = phrases(db_path).iloc[0]
+    assert (row["youtube_url"], row["timestamp"], row["video_id"]) == (
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb", 42, "bbbbbbbbbbb"
+    )
+    assert row["is_learned"] == 1
+
+
+def test_unknown_on_duplicate_is_rejected(db_path):
+    with pytest.raises(ValueError):
+        sqlite_backend.import_phrases_from_df(
+            1, pd.DataFrame({"phrase": ["a"], "meaning": ["b"]}), on_duplicate="replace"
+        )
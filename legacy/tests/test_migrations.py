@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importer  # noqa: E402
+import migrations  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+# The single-user schema the app had before accounts existed
+BASELINE_SCHEMA = """
+CREATE TABLE phrases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phrase TEXT NOT NULL,
+    meaning TEXT,
+    youtube_url TEXT,
+    timestamp INTEGER,
+    is_learned BOOLEAN DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+BASELINE_ROWS = [
+    ("Good morning", "おはよう", "https://youtu.be/aaaaaaaaaaa", 5, 1),
+    ("good  morning", "おはよう", "", 0, 0),  # same content as the row before it
+    ("Take care", "気をつけて", "https://www.youtube.com/watch?v=bbbbbbbbbbb", 70, 0),
+    ("See you", "またね", None, None, 0),
+    ("Thank you", "ありがとう", "", 0, 0),
+]
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(BASELINE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO phrases (phrase, meaning, youtube_url, timestamp, is_learned) "
+            "VALUES (?, ?, ?, ?, ?)", BASELINE_ROWS,
+        )
+    conn.close()
+    return path
+
+
+def query(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_upgrades_the_baseline_schema(baseline_db):
+    applied = migrations.migrate_database(baseline_db, batch_size=2)
+
+    assert [m.version for m in applied] == [m.version for m in migrations.MIGRATIONS]
+    assert query(baseline_db, "SELECT username FROM users") == [(migrations.DEFAULT_USERNAME,)]
+    rows = query(baseline_db, "SELECT user_id, phrase, is_learned, content_hash, due_at = created_at, "
+                              "minhash IS NOT NULL, video_id FROM phrases ORDER BY id")
+    assert [r[1] for r in rows] == [r[0] for r in BASELINE_ROWS]
+    assert {r[0] for r in rows} == {1}
+    assert [r[2] for r in rows] == [1, 0, 0, 0, 0]
+    assert rows[0][3] == importer.content_hash("Good morning", "おはよう")
+    assert rows[1][3] is None  # a duplicate of an earlier row keeps a NULL hash
+    assert all(r[3] for r in rows[2:])
+    assert all(r[4] and r[5] for r in rows)
+    assert [r[6] for r in rows] == ["aaaaaaaaaaa", "", "bbbbbbbbbbb", "", ""]
+    assert query(baseline_db, "SELECT rowid FROM phrases_fts WHERE phrases_fts MATCH 'care'") == [(3,)]
+    assert not query(baseline_db, "SELECT * FROM migration_checkpoint")
+
+    assert migrations.migrate_database(baseline_db) == []
+
+
+def test_interrupted_backfill_resumes_after_its_checkpoint(baseline_db, monkeypatch):
+    hashed = []
+    content_hashes = importer.content_hashes
+
+    def failing_after_one_batch(phrase, meaning):
+        if hashed:
+            raise RuntimeError("interrupted")
+        hashed.extend(phrase.tolist())
+        return content_hashes(phrase, meaning)
+
+    monkeypatch.setattr(importer, "content_hashes", failing_after_one_batch)
+    with pytest.raises(RuntimeError):
+        migrations.migrate_database(baseline_db, batch_size=2)
+
+    version = next(m.version for m in migrations.MIGRATIONS if m.apply is migrations.add_content_hash)
+    assert max(v for (v,) in query(baseline_db, "SELECT version FROM schema_version")) == version - 1
+    assert query(baseline_db, "SELECT version, last_id FROM migration_checkpoint") == [(version, 2)]
+    assert len(hashed) == 2
+
+    monkeypatch.setattr(importer, "content_hashes", content_hashes)
+    applied = migrations.migrate_database(baseline_db, batch_size=2)
+    assert applied[0].version == version and applied[-1].version == migrations.LATEST
+    hashes = [h for (h,) in query(baseline_db, "SELECT content_hash FROM phrases ORDER BY id")]
+    assert hashes[0] and hashes[1] is None and all(hashes[2:])
+
+
+def test_app_refuses_an_outdated_database(baseline_db):
+    sqlite_backend.configure(baseline_db)
+    with pytest.raises(migrations.SchemaError):
+        with sqlite_backend.connection():
+            pass
+
+    migrations.migrate_database(baseline_db)
+    with sqlite_backend.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM phrases").fetchone()[0] == len(BASELINE_ROWS)
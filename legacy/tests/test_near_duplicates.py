@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import near_duplicates  # noqa: E402
+
+PHRASES = [
+    "I would like to go to the station tomorrow morning, please.",   # 10
+    "Could you tell me the way to the nearest post office?",          # 11
+    "I would like to go to the station tomorrow morning please",      # 12
+    "It has been raining all week and the river is rising.",          # 13
+    "Could you tell me the way to the nearest post office",           # 14
+    "I would like to go to the station tomorrow morning, please!",    # 15
+]
+IDS = [10, 11, 12, 13, 14, 15]
+
+
+def test_groups_variants_and_leaves_distinct_phrases_out():
+    sigs = near_duplicates.signatures(PHRASES)
+    groups = near_duplicates.group_duplicates(IDS, sigs)
+    assert [sorted(g) for g in groups] == [[10, 12, 15], [11, 14]]
+
+
+def test_signatures_round_trip_through_blobs():
+    blobs = near_duplicates.signature_blobs(PHRASES)
+    assert np.array_equal(near_duplicates.from_blobs(blobs, PHRASES),
+                          near_duplicates.signatures(PHRASES))
+
+
+def test_threshold_one_only_groups_identical_shingles():
+    sigs = near_duplicates.signatures(["same text here", "Same text here", "other words"])
+    assert near_duplicates.group_duplicates([1, 2, 3], sigs, threshold=1.0) == [[1, 2]]
+    assert near_duplicates.group_duplicates([1], sigs[:1]) == []
+
+
+def test_chain_is_one_group_but_its_ends_are_not_alike():
+    # a~b and b~c are above the threshold, a~c is not
+    a = "the quick brown fox jumps over the lazy dog near the river bank"
+    b = "the quick brown fox jumps over the lazy cat near the river side"
+    c = "a quick brown cat jumps over the lazy cat near the river side today"
+    sigs = near_duplicates.signatures([a, b, c])
+    assert near_duplicates.group_duplicates([1, 2, 3], sigs) == [[1, 2, 3]]
+
+    kept = near_duplicates.similarities(sigs, np.array([1, 2]), np.array([0, 0]))
+    assert kept[0] >= near_duplicates.DEFAULT_THRESHOLD > kept[1]
+    assert near_duplicates.similarity(sigs[2], sigs[0]) == kept[1]
+
+
+def test_merged_fields_keep_the_first_video_and_any_learned_flag():
+    fields = near_duplicates.merged_fields([
+        {"youtube_url": "", "timestamp": 0, "is_learned": False},
+        {"youtube_url": "https://youtu.be/aaaaaaaaaaa", "timestamp": 30, "is_learned": True},
+        {"youtube_url": "https://youtu.be/bbbbbbbbbbb", "timestamp": 5, "is_learned": False},
+    ])
+    assert fields["youtube_url"] == "https://youtu.be/aaaaaaaaaaa"
+    assert (fields["timestamp"], fields["video_id"], fields["is_learned"]) == (30, "aaaaaaaaaaa", True)
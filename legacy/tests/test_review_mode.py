@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+LEGACY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LEGACY)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import sqlite_backend  # noqa: E402
+
+DUE = 200
+
+
+def review_page(legacy):
+    # Runs as its own script under AppTest, so it imports what it uses
+    import sys
+    sys.path.insert(0, legacy)
+    from views import review_mode
+    review_mode.render(1)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    st.cache_resource.clear()  # get_backend and the write queues are per process
+    path = str(tmp_path / "review.db")
+    sqlite_backend.configure(path)
+    sqlite_backend.create_user("reviewer", "pw")
+    sqlite_backend.import_phrases_from_df(1, pd.DataFrame({
+        "phrase": [f"due phrase {i}" for i in range(DUE)],
+        "meaning": [f"意味 {i}" for i in range(DUE)],
+    }))
+    return path
+
+
+def test_learned_clicks_past_one_page_keep_the_session_going(db_path):
+    at = AppTest.from_function(review_page, args=(LEGACY,), default_timeout=30)
+    at.secrets["database"] = {"backend": "sqlite", "path": db_path}
+    # Keep the learned ids queued (not yet written) for the whole session
+    at.secrets["write_behind"] = {"max_pending": 1000, "max_delay": 3600}
+    at.run()
+    for clicked in range(DUE // 2):
+        assert not at.exception
+        assert not at.success, f"session ended after {clicked} cards"
+        at.button(key="review_learned").click().run()
+    assert not at.success
+    assert any(c.value.startswith("Reviewed: 100 ") for c in at.caption)
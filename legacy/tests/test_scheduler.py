@@ -0,0 +1,78 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def review(card, *qualities):
+    for quality in qualities:
+        card = scheduler.next_schedule(card, quality, now=NOW)
+    return card
+
+
+def test_new_card_intervals_grow_one_six_then_by_ease():
+    first = review({}, 4)
+    assert first == {"due_at": "2026-01-02 12:00:00", "interval_days": 1,
+                     "ease": scheduler.DEFAULT_EASE, "repetitions": 1}
+    assert review(first, 4)["interval_days"] == 6
+    third = review(first, 4, 5)
+    assert third["interval_days"] == round(6 * scheduler.DEFAULT_EASE)
+    assert third["ease"] == pytest.approx(scheduler.DEFAULT_EASE + 0.1)
+
+
+def test_lapse_resets_repetitions_and_lowers_ease():
+    card = review({}, 5, 5, 5)
+    lapsed = review(card, scheduler.RATINGS["again"])
+    assert (lapsed["repetitions"], lapsed["interval_days"]) == (0, 1)
+    assert lapsed["ease"] < card["ease"]
+
+
+def test_ease_never_drops_below_the_floor():
+    assert review({}, *[0] * 20)["ease"] == scheduler.MIN_EASE
+
+
+def test_missing_values_fall_back_to_defaults():
+    card = pd.Series({"repetitions": None, "interval_days": float("nan"), "ease": float("nan")})
+    assert review(card, 4) == review({}, 4)
+
+
+def test_quality_out_of_range_is_rejected():
+    with pytest.raises(ValueError):
+        scheduler.next_schedule({}, 6)
+
+
+@pytest.fixture
+def user_id(tmp_path):
+    sqlite_backend.configure(str(tmp_path / "due.db"))
+    sqlite_backend.create_user("scheduler", "pw")
+    sqlite_backend.import_phrases_from_df(1, pd.DataFrame({
+        "phrase": [f"phrase {i}" for i in range(5)], "meaning": [f"意味 {i}" for i in range(5)],
+    }))
+    return 1
+
+
+def test_due_queue_drops_rated_and_learned_cards(user_id):
+    now = scheduler.utc_now() + timedelta(minutes=1)
+    due = sqlite_backend.get_due_phrases(user_id, limit=10, now=now)
+    assert due["phrase"].tolist() == [f"phrase {i}" for i in range(5)]
+
+    rated, learned = due.iloc[0], due.iloc[1]
+    sqlite_backend.update_schedule(rated["id"], user_id, scheduler.next_schedule(rated, 4, now=now))
+    sqlite_backend.mark_as_learned(learned["id"], user_id)
+
+    due = sqlite_backend.get_due_phrases(user_id, limit=10, now=now)
+    assert due["phrase"].tolist() == ["phrase 2", "phrase 3", "phrase 4"]
+    assert sqlite_backend.get_due_phrases(user_id, limit=2, now=now)["phrase"].tolist() == \
+        ["phrase 2", "phrase 3"]
+
+    tomorrow = sqlite_backend.get_due_phrases(user_id, limit=10, now=now + timedelta(days=1, minutes=1))
+    assert tomorrow["phrase"].tolist() == ["phrase 2", "phrase 3", "phrase 4", "phrase 0"]
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from write_behind import WriteBehindQueue
+
+
+class Backend:
+    """apply() stand-in that fails for the ops listed in failing"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.applied = []
+
+    def __call__(self, op, ids):
+        if op in self.failing:
+            raise RuntimeError(f"{op} failed")
+        self.applied.append((op, ids))
+
+
+def test_failed_batch_keeps_later_batches_pending():
+    backend = Backend(failing={"learned"})
+    queue = WriteBehindQueue(backend, max_pending=100, max_delay=60)
+    queue.enqueue("learned", 1)
+    queue.enqueue("delete", 2)
+
+    with pytest.raises(RuntimeError):
+        queue.flush()
+
+    assert backend.applied == []
+    assert queue.pending() == {"learned": frozenset({1}), "delete": frozenset({2})}
+    assert queue._timer is not None  # re-armed, so the retry needs no new enqueue
+
+    backend.failing.clear()
+    queue.flush()
+    assert backend.applied == [("learned", [1]), ("delete", [2])]
+    assert queue.pending() == {"learned": frozenset(), "delete": frozenset()}
+    assert queue._timer is None
+
+
+def test_timer_flush_retries_after_failure():
+    backend = Backend(failing={"delete"})
+    queue = WriteBehindQueue(backend, max_pending=100, max_delay=60)
+    queue.enqueue("learned", 1)
+    queue.enqueue("delete", 2)
+
+    queue._flush_from_timer()  # logs instead of raising
+
+    assert backend.applied == [("learned", [1])]
+    assert queue.pending()["delete"] == frozenset({2})
+    assert queue._timer is not None
+    queue._cancel_timer()
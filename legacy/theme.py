@@ -0,0 +1,46 @@
+"""
+App-wide styling.
+The stylesheet lives in style.css and is added to the page's <head> once per browser
+session by a zero-height component script, instead of being re-sent as a markdown
+element on every rerun. The <head> outlives reruns (Streamlit only replaces the
+elements in the app body), so later reruns skip it entirely; a reload starts a new
+session and injects it again.
+"""
+#%%
+import json
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+
+CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css")
+STYLE_ID = "english-phrase-app-style"
+
+_INJECT = """
+<script>
+const doc = window.parent.document;
+let style = doc.getElementById(%(id)s);
+if (!style) {
+    style = doc.createElement("style");
+    style.id = %(id)s;
+    doc.head.appendChild(style);
+}
+style.textContent = %(css)s;
+</script>
+"""
+
+#%%
+@st.cache_resource
+def stylesheet():
+    """style.css, read once per process"""
+    with open(CSS_PATH, encoding="utf-8") as f:
+        return f.read()
+
+def inject_css():
+    """Add the stylesheet to the page once per session (no-op on reruns)"""
+    if st.session_state.get("css_injected"):
+        return
+    components.html(
+        _INJECT % {"id": json.dumps(STYLE_ID), "css": json.dumps(stylesheet())},
+        height=0,
+    )
+    st.session_state.css_injected = True
@@ -0,0 +1,138 @@
+"""
+Content-addressed on-disk cache for synthesized audio.
+Files are named by a hash of (normalized text, lang, engine settings), written
+atomically (temp file + os.replace) and evicted least-recently-used first once
+the directory grows past max_bytes. Recency is the file's mtime, refreshed on
+every hit, so the LRU order survives restarts.
+"""
+#%%
+import json
+import hashlib
+import os
+import tempfile
+import threading
+
+from normalize import compose, normalize_text
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# NFKC + collapsed whitespace, so trivially different inputs share an entry; case is
+# kept, since it can change how a phrase is read out
+_KEY_RULES = compose("nfkc", "whitespace")
+
+#%%
+def cache_key(text, lang, settings=None):
+    """Hex digest identifying one synthesized clip"""
+    payload = json.dumps(
+        [normalize_text(str(text), _KEY_RULES), lang, settings or {}], ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+#%%
+class AudioCache:
+    """Size-bounded LRU cache of audio bytes on disk"""
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, suffix=".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._sizes = self._scan()  # path -> size in bytes
+        self._total = sum(self._sizes.values())
+
+    def _scan(self):
+        sizes = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(self.suffix):
+                    path = os.path.join(root, name)
+                    sizes[path] = os.path.getsize(path)
+        return sizes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key):
+        """Return cached bytes for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store data under key atomically, then evict if over max_bytes"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self._lock:
+            self._total += len(data) - self._sizes.get(path, 0)
+            self._sizes[path] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used files until under 90% of max_bytes (lock held)"""
+        target = self.max_bytes * 0.9
+        by_age = []
+        for path in self._sizes:
+            try:
+                by_age.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                by_age.append((0, path))
+        for _, path in sorted(by_age):
+            if self._total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self._total -= self._sizes.pop(path)
+            self.evictions += 1
+
+    def get_or_synthesize(self, text, lang, synthesize, settings=None):
+        """Return audio for (text, lang) from the cache, synthesizing and storing it on a miss"""
+        key = cache_key(text, lang, settings)
+        data = self.get(key)
+        if data is None:
+            data = synthesize(text, lang)
+            self.put(key, data)
+        return data
+
+    def wrap(self, synthesize, settings=None):
+        """Return a synthesize(text, lang) function that goes through this cache"""
+        return lambda text, lang: self.get_or_synthesize(text, lang, synthesize, settings)
+
+    def stats(self):
+        """Return hit/miss counters and disk usage"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "files": len(self._sizes),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
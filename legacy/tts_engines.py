@@ -0,0 +1,177 @@
+"""
+Text-to-speech engines for Radio Mode.
+Every engine turns (text, lang) into MP3 bytes and offers a batch
+synthesize_many([(text, lang), ...]) that runs on a bounded thread pool. Each engine
+instance also caps its own in-flight requests (max_concurrency), however many
+sessions or pools call it at once.
+
+- gtts:   Google Translate TTS via gTTS (network, rate limited)
+- espeak: espeak-ng piped through lame (offline; both must be on PATH)
+- silent: deterministic silent MP3 clips sized by text length (offline tests/benchmarks)
+
+Select one in secrets.toml:
+
+    [tts]
+    engine = "gtts"
+    max_concurrency = 4
+"""
+#%%
+import io
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import mp3
+
+DEFAULT_RETRIES = 3      # attempts per segment
+DEFAULT_BACKOFF = 1.0    # seconds before the first retry, doubled after each
+
+#%%
+def synthesize_with_retry(synthesize, text, lang, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Call synthesize(text, lang), retrying with exponential backoff"""
+    delay = backoff
+    for attempt in range(retries):
+        try:
+            return synthesize(text, lang)
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+def synthesize_many(synthesize, requests, workers=4, retries=DEFAULT_RETRIES,
+                    backoff=DEFAULT_BACKOFF, on_done=None):
+    """Synthesize every distinct (text, lang) in requests on a bounded thread pool.
+    on_done(done, total, text) is called from the calling thread as segments finish,
+    so it may update Streamlit. Returns {(text, lang): audio bytes}.
+    """
+    unique = list(dict.fromkeys(requests))
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(synthesize_with_retry, synthesize, text, lang, retries, backoff): (text, lang)
+            for text, lang in unique
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            results[key] = future.result()
+            if on_done is not None:
+                on_done(done, len(unique), key[0])
+    return results
+
+#%%
+class TTSEngine:
+    """Base class: subclasses implement _synthesize(text, lang) -> MP3 bytes"""
+
+    name = None
+    default_concurrency = 4
+
+    def __init__(self, max_concurrency=None):
+        self.max_concurrency = max_concurrency or self.default_concurrency
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @property
+    def settings(self):
+        """Everything that changes the audio; part of the audio cache key"""
+        return {"engine": self.name}
+
+    def synthesize(self, text, lang):
+        """Return MP3 bytes for text, waiting for a free slot of this engine"""
+        with self._slots:
+            return self._synthesize(text, lang)
+
+    def synthesize_many(self, requests, workers=None, on_done=None, **retry):
+        """Batch synthesis: {(text, lang): bytes} for every request"""
+        return synthesize_many(
+            self.synthesize, requests, workers or self.max_concurrency, on_done=on_done, **retry
+        )
+
+    def _synthesize(self, text, lang):
+        raise NotImplementedError
+
+#%%
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS through gTTS"""
+
+    name = "gtts"
+
+    def __init__(self, tld="com", slow=False, max_concurrency=None):
+        super().__init__(max_concurrency)
+        self.tld = tld
+        self.slow = slow
+
+    @property
+    def settings(self):
+        return {"engine": self.name, "tld": self.tld, "slow": self.slow}
+
+    def _synthesize(self, text, lang):
+        from gtts import gTTS
+        buf = io.BytesIO()
+        gTTS(text=text, lang=lang, tld=self.tld, slow=self.slow).write_to_fp(buf)
+        return buf.getvalue()
+
+#%%
+class EspeakEngine(TTSEngine):
+    """Offline synthesis: espeak-ng renders WAV, lame encodes it to MP3"""
+
+    name = "espeak"
+    default_concurrency = 2  # CPU bound
+    VOICES = {"en": "en-us", "ja": "ja"}
+
+    def __init__(self, speed=160, bitrate=32, max_concurrency=None):
+        super().__init__(max_concurrency)
+        self.speed = speed
+        self.bitrate = bitrate
+        missing = [tool for tool in ("espeak-ng", "lame") if shutil.which(tool) is None]
+        if missing:
+            raise RuntimeError(f"espeak engine needs {', '.join(missing)} on PATH")
+
+    @property
+    def settings(self):
+        return {"engine": self.name, "speed": self.speed, "bitrate": self.bitrate}
+
+    def _synthesize(self, text, lang):
+        wav = subprocess.run(
+            ["espeak-ng", "-v", self.VOICES.get(lang, lang), "-s", str(self.speed), "--stdout", text],
+            check=True, capture_output=True,
+        ).stdout
+        return subprocess.run(
+            ["lame", "--quiet", "-b", str(self.bitrate), "-", "-"],
+            input=wav, check=True, capture_output=True,
+        ).stdout
+
+#%%
+class SilentEngine(TTSEngine):
+    """Deterministic offline engine: MPEG2 Layer III 24 kHz / 32 kbps mono (gTTS's format)
+    silent frames behind an ID3 tag, ~70 ms of audio per character.
+    latency simulates a network engine for benchmarks."""
+
+    name = "silent"
+    default_concurrency = 16
+
+    HEADER = mp3.parse_header(b"\xff\xf3\x44\xc4")
+    ID3_TAG = b"ID3\x04\x00\x00\x00\x00\x00\x16" + bytes(22)
+
+    def __init__(self, latency=0.0, max_concurrency=None):
+        super().__init__(max_concurrency)
+        self.latency = latency
+        self._frame = mp3.silence_frame(self.HEADER)
+
+    def _synthesize(self, text, lang):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.ID3_TAG + self._frame * max(1, len(text) * 3)
+
+#%%
+ENGINES = {
+    GTTSEngine.name: GTTSEngine,
+    EspeakEngine.name: EspeakEngine,
+    SilentEngine.name: SilentEngine,
+}
+
+def get_engine(name="gtts", **options):
+    """Instantiate an engine by name; options go to its constructor"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name}")
+    return ENGINES[name](**options)
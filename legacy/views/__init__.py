@@ -0,0 +1,62 @@
+"""
+Pages of the app after login, one module each with a render(user_id) function.
+app.py only imports the module of the page that is selected, the first time it is
+opened: the login page never loads pandas or the Radio Mode stack (radio, TTS, audio
+cache, stream server), and Radio Mode's gTTS is only imported when audio is made.
+Page modules stay in sys.modules, so later reruns pay nothing to import them again.
+
+How long each first import took (the module plus whatever it pulled in, and app.py's
+own imports) is logged on the "views" logger and returned by import_times(), shown
+on Manage Data. For a full breakdown of the process's imports, run:
+
+    python -X importtime -m streamlit run app.py 2> importtime.log
+"""
+#%%
+import importlib
+import logging
+import sys
+import threading
+import time
+
+# Menu label -> module in this package, in menu order
+PAGES = {
+    "Review Mode": "review_mode",
+    "Radio Mode": "radio_mode",
+    "Add Phrase": "add_phrase",
+    "Data Import": "data_import",
+    "All Phrases": "all_phrases",
+    "Videos": "videos",
+    "Manage Data": "manage_data",
+}
+
+logger = logging.getLogger("views")
+
+_import_times = {}  # module name -> seconds of its first import (this process)
+_lock = threading.Lock()
+
+#%%
+def load(label):
+    """Return the page module for a menu label, importing it on first use"""
+    name = f"{__name__}.{PAGES[label]}"
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:  # sessions run in parallel threads; time only the import that happens
+        if name not in sys.modules:
+            started = time.perf_counter()
+            importlib.import_module(name)
+            _import_times[name] = time.perf_counter() - started
+            logger.info("imported %s in %.1f ms", name, _import_times[name] * 1000)
+    return sys.modules[name]
+
+def record_import(name, seconds):
+    """Record an import timed elsewhere (app.py's own imports); the first one counts"""
+    with _lock:
+        if name not in _import_times:
+            _import_times[name] = seconds
+            logger.info("imported %s in %.1f ms", name, seconds * 1000)
+
+def import_times():
+    """{module: milliseconds} for app.py and the page modules imported so far"""
+    with _lock:
+        return {name: round(seconds * 1000, 1) for name, seconds in _import_times.items()}
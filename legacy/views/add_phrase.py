@@ -0,0 +1,26 @@
+"""
+Add Phrase page: one phrase with an optional YouTube URL and start time.
+"""
+#%%
+import streamlit as st
+import database as db
+
+#%%
+def render(user_id):
+    """Form for adding a single phrase"""
+    st.header("Add New Phrase")
+    with st.form("add_form"):
+        phrase = st.text_input("English Phrase", placeholder="e.g. piece of cake")
+        meaning = st.text_input("Meaning (Japanese)", placeholder="e.g. 朝飯前")
+        url = st.text_input("YouTube URL", placeholder="https://youtu.be/...")
+        timestamp = st.number_input("Timestamp (seconds)", min_value=0, step=1)
+
+        submitted = st.form_submit_button("Add Phrase", type="primary")
+        if submitted:
+            if phrase:
+                if db.add_phrase(user_id, phrase, meaning, url, timestamp):
+                    st.success(f"Added successfully: **{phrase}**")
+                else:
+                    st.warning(f"Already in your phrases: **{phrase}**")
+            else:
+                st.error("Please enter a phrase.")
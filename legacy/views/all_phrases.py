@@ -0,0 +1,46 @@
+"""
+All Phrases page: every phrase newest first, or full-text search results, one
+keyset page at a time.
+"""
+#%%
+import streamlit as st
+import database as db
+
+#%%
+def paged_fetch(key, fetch_page, user_id):
+    """Fetch the current page for `key` and draw Prev/Next controls.
+    Keeps a stack of keyset cursors in session_state so only the shown page is queried.
+    """
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    df, next_cursor = fetch_page(user_id, cursors[-1])
+    
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if len(cursors) > 1 and st.button("◀ Prev", key=f"{key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if next_cursor is not None and st.button("Next ▶", key=f"{key}_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+    return df
+
+#%%
+def render(user_id):
+    """Paged list of all phrases with a search box"""
+    st.header("All Phrases List")
+    query = st.text_input("🔍 Search", placeholder="English or 日本語 (e.g. piece / 朝飯前)").strip()
+    if query:
+        if st.session_state.get("search_query") != query:
+            # New query: start again from its first page
+            st.session_state.search_query = query
+            st.session_state.pop("search_cursors", None)
+        df = paged_fetch("search", lambda uid, cursor: db.search_phrases(uid, query, cursor), user_id)
+    else:
+        df = paged_fetch("all_phrases", db.get_all_phrases_page, user_id)
+    if not df.empty:
+        st.dataframe(df)
+    else:
+        st.info("No phrases found.")
@@ -0,0 +1,50 @@
+"""
+Data Import page: upload a CSV, map its columns and import it in chunks.
+The only page that builds DataFrames itself, so the only one importing pandas.
+"""
+#%%
+import streamlit as st
+import pandas as pd
+import database as db
+
+#%%
+def render(user_id):
+    """CSV upload, column mapping and import with a progress bar"""
+    st.header("Data Import (CSV)")
+    st.write("CSVファイルをアップロードしてください（例: No, 英文, 日本語訳）")
+
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+
+    if uploaded_file is not None:
+        try:
+            df = pd.read_csv(uploaded_file)
+            st.write("Preview:")
+            st.dataframe(df.head())
+
+            # Column mapping
+            cols = df.columns.tolist()
+            phrase_col = st.selectbox("Select 'English Phrase' column", cols, index=1 if len(cols) > 1 else 0)
+            meaning_col = st.selectbox("Select 'Japanese Meaning' column", cols, index=2 if len(cols) > 2 else 0)
+
+            if st.button("Import Data", type="primary"):
+                # Rename columns for the DB function
+                import_df = df.rename(columns={phrase_col: 'phrase', meaning_col: 'meaning'})
+
+                # Optional: clear existing data
+                if st.checkbox("Delete existing data before import?"):
+                    db.clear_all_phrases(user_id)
+
+                import_progress = st.progress(0.0)
+                def on_progress(done, total):
+                    import_progress.progress(done / total, text=f"Importing... {done}/{total}")
+
+                report = db.import_phrases_from_df(user_id, import_df, progress=on_progress)
+                if report.ok:
+                    st.success(f"Successfully imported {report.inserted} phrases! ({report.skipped} already registered)")
+                else:
+                    st.warning(f"Imported {report.inserted} of {report.total} phrases. {report.failed} rows failed.")
+                    with st.expander("Failed rows"):
+                        st.write(report.errors)
+                        st.dataframe(df.loc[report.failed_rows])
+        except Exception as e:
+            st.error(f"Error: {e}")
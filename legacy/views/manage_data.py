@@ -0,0 +1,109 @@
+"""
+Manage Data page: bulk resets and deletes, near-duplicate cleanup and diagnostics.
+"""
+#%%
+import streamlit as st
+import database as db
+import near_duplicates
+import views
+
+NEAR_DUPLICATE_GROUPS_SHOWN = 30  # largest groups listed at once
+
+#%%
+def render(user_id):
+    """Danger zone, near-duplicates, cache/timing stats"""
+    st.header("Manage Data ⚙️")
+
+    st.subheader("⚠️ Danger Zone")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.write("**Reset Learning Progress**")
+        st.caption("全てのフレーズを「未学習」に戻します。データは削除されません。")
+        if st.button("Reset Progress"):
+            db.reset_all_progress(user_id)
+            st.success("Reset complete!")
+
+    with col2:
+        st.write("**Delete ALL Data**")
+        st.caption("全てのデータを削除します。この操作は取り消せません。")
+        if st.checkbox("I understand the consequences", key="del_all_check"):
+            if st.button("Delete ALL Phrases", type="primary"):
+                db.clear_all_phrases(user_id)
+                st.success("All phrases have been deleted.")
+                st.rerun()
+
+    st.divider()
+
+    st.subheader("Bulk Delete (Learned Only)")
+    st.write("学習済みのフレーズのみを削除します。")
+    if st.button("Delete Learned Phrases"):
+        db.delete_learned_phrases(user_id)
+        st.success("Deleted all learned phrases.")
+        st.rerun()
+
+    st.divider()
+
+    st.subheader("🔁 Near-duplicates")
+    st.write("表記ゆれ・句読点違いなど、ほぼ同じフレーズをまとめて表示します（各グループの最も古いものを残します）。")
+    if st.button("Scan for near-duplicates"):
+        st.session_state.near_duplicates_scanned = True
+    if st.session_state.get("near_duplicates_scanned"):
+        duplicates = db.find_near_duplicates(user_id)
+        if duplicates.empty:
+            st.info("No near-duplicates found.")
+        else:
+            groups = duplicates["group"].nunique()
+            st.caption(f"{groups} groups, {len(duplicates) - groups} duplicates")
+            shown = duplicates[duplicates["group"] < NEAR_DUPLICATE_GROUPS_SHOWN]
+            selected = []  # (kept id, [ids to fold into it]) per checked group
+            for _, group in shown.groupby("group"):
+                keep, others = group.iloc[0], group.iloc[1:]
+                checked = st.checkbox(f"{keep['phrase']}  (+{len(others)})",
+                                      key=f"near_dup_{keep['id']}")
+                # A group is a chain of near-matches: only members close to the kept
+                # phrase itself start out ticked
+                rows = st.data_editor(
+                    others[["id", "phrase", "meaning", "is_learned", "similarity"]].assign(
+                        fold=others["similarity"] >= near_duplicates.DEFAULT_THRESHOLD
+                    ),
+                    column_config={
+                        "fold": st.column_config.CheckboxColumn("Merge/delete"),
+                        "similarity": st.column_config.NumberColumn(format="%.2f"),
+                    },
+                    disabled=["id", "phrase", "meaning", "is_learned", "similarity"],
+                    hide_index=True, key=f"near_dup_rows_{keep['id']}",
+                )
+                drop_ids = rows.loc[rows["fold"], "id"].tolist()
+                if checked and drop_ids:
+                    selected.append((keep["id"], drop_ids))
+            if groups > shown["group"].nunique():
+                st.caption(f"Showing the largest {NEAR_DUPLICATE_GROUPS_SHOWN} groups; "
+                           "resolve them to see the rest.")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(f"Merge selected ({len(selected)})", disabled=not selected):
+                    for keep_id, drop_ids in selected:
+                        db.merge_phrases(keep_id, drop_ids, user_id)
+                    st.success(f"Merged {len(selected)} groups.")
+                    st.rerun()
+            with col2:
+                if st.button(f"Delete duplicates in selected ({len(selected)})", disabled=not selected):
+                    db.delete_phrases([i for _, drop_ids in selected for i in drop_ids], user_id)
+                    st.success(f"Deleted duplicates from {len(selected)} groups.")
+                    st.rerun()
+
+    st.divider()
+
+    with st.expander("Query cache stats"):
+        st.json(db.cache_stats())
+
+    metrics = db.metrics_snapshot()
+    if metrics:
+        with st.expander("Query timing"):
+            st.json(metrics)
+
+    with st.expander("Page import timing (ms)"):
+        st.json(views.import_times())
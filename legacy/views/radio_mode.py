@@ -0,0 +1,144 @@
+"""
+Radio Mode page: due phrases read aloud (English x2 -> Japanese x1).
+Everything audio related (radio, TTS engines, audio cache, pre-renderer, stream
+server) is imported here, so other pages never load it.
+"""
+#%%
+import base64
+import streamlit as st
+import database as db
+import radio
+from radio_stream import RadioStreamServer
+from tts_cache import AudioCache, DEFAULT_DIR
+from tts_engines import get_engine
+from prerender import EpisodePrerenderer, episode_signature
+
+#%%
+@st.cache_resource
+def get_audio_cache():
+    """On-disk TTS cache shared by all sessions ([tts_cache] in secrets.toml)"""
+    config = st.secrets.get("tts_cache", {})
+    return AudioCache(
+        directory=config.get("directory", DEFAULT_DIR),
+        max_bytes=int(config.get("max_mb", 200) * 1024 * 1024),
+    )
+
+#%%
+@st.cache_resource
+def get_tts_engine():
+    """TTS engine for Radio Mode ([tts] in secrets.toml; gTTS by default)"""
+    options = dict(st.secrets.get("tts", {}))
+    return get_engine(options.pop("engine", "gtts"), **options)
+
+@st.cache_resource
+def get_prerenderer():
+    """Background worker that keeps each user's radio episode ready ([radio] prerender_phrases)"""
+    config = st.secrets.get("radio", {})
+    engine = get_tts_engine()
+    phrases = config.get("prerender_phrases", 20)
+    prerenderer = EpisodePrerenderer(
+        lambda user_id: db.get_due_phrases(user_id, phrases),
+        get_audio_cache().wrap(engine.synthesize, engine.settings),
+        phrases=phrases,
+        workers=config.get("workers", radio.DEFAULT_WORKERS),
+    )
+    db.add_change_listener(prerenderer.request_rebuild)
+    return prerenderer
+
+@st.cache_resource
+def get_radio_stream_server():
+    """Local HTTP server that streams radio episodes ([radio] in secrets.toml)"""
+    config = st.secrets.get("radio", {})
+    return RadioStreamServer(
+        host=config.get("stream_host", "127.0.0.1"),
+        port=config.get("stream_port", 8765),
+        public_url=config.get("stream_url"),
+    )
+
+def radio_player_html(src):
+    return f'''
+    <div style="margin: 20px 0;">
+        <audio controls style="width: 100%;">
+            <source src="{src}" type="audio/mp3">
+            お使いのブラウザは音声再生に対応していません。
+        </audio>
+    </div>
+    '''
+
+def generate_radio_inline(target_df, synthesize, workers):
+    """Render the whole episode, then embed it as a base64 data URI (works on iOS without a server)"""
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    try:
+        def on_progress(done, total, text):
+            status_text.text(f"Generated audio for: {text} ({done}/{total})")
+            progress_bar.progress(done / total)
+        
+        audio_data, seek_index = radio.build_indexed_episode(target_df, synthesize, on_progress=on_progress, workers=workers)
+        
+        stats = get_audio_cache().stats()
+        status_text.text(f"Generation Complete! (audio cache hit rate: {stats['hit_rate']:.0%})")
+        
+        # Use HTML audio tag with base64 for iOS compatibility
+        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        st.markdown(radio_player_html(f"data:audio/mp3;base64,{audio_base64}"), unsafe_allow_html=True)
+        st.info("↑ 上のプレイヤーの再生ボタンを押してください。")
+        
+        with st.expander("フレーズ一覧（再生位置）"):
+            for entry in seek_index:
+                minutes, seconds = divmod(int(entry["seconds"]), 60)
+                st.write(f"`{minutes:02d}:{seconds:02d}` {entry['label']}")
+        
+    except Exception as e:
+        st.error(f"エラーが発生しました: {e}")
+
+#%%
+def render(user_id):
+    """Pre-rendered episode if ready, otherwise generate one (inline or streamed)"""
+    st.header("Radio Mode 📻")
+    st.write("復習期限が来たフレーズを再生します（英語×2 → 日本語×1）。完了済みのものは除外されます。")
+
+    radio_config = st.secrets.get("radio", {})
+    df = db.get_due_phrases(user_id, radio_config.get("max_phrases", 100))
+
+    if df.empty:
+        st.success("🎉 再生するフレーズがありません！今は復習期限のフレーズがありません。")
+    else:
+        st.write(f"対象フレーズ数: {len(df)}件")
+        if len(df) > 1:
+            limit = st.slider("再生する件数（多すぎると生成に時間がかかります）", 1, len(df), min(10, len(df)))
+        else:
+            limit = 1
+
+        workers = radio_config.get("workers", radio.DEFAULT_WORKERS)
+
+        # Pre-rendered episode: ready as soon as the page opens
+        prerenderer = get_prerenderer()
+        episode = prerenderer.get_episode(user_id)
+        current = episode_signature(radio.episode_segments(df.head(prerenderer.phrases)))
+        if episode is not None and episode.signature == current and episode.phrases:
+            with st.container(border=True):
+                st.write(f"⚡ 準備済みのエピソード（{episode.phrases}件）")
+                audio_base64 = base64.b64encode(episode.audio).decode('utf-8')
+                st.markdown(radio_player_html(f"data:audio/mp3;base64,{audio_base64}"), unsafe_allow_html=True)
+        elif not prerenderer.is_pending(user_id):
+            prerenderer.request_rebuild(user_id)
+        else:
+            st.caption("バックグラウンドでエピソードを準備中です…")
+
+        if st.button("📻 ラジオ生成スタート", type="primary", use_container_width=True):
+            # Use a subset of data
+            target_df = df.head(limit)[['phrase', 'meaning']].copy()
+            engine = get_tts_engine()
+            synthesize = get_audio_cache().wrap(engine.synthesize, engine.settings)
+
+            if radio_config.get("stream", False):
+                # The player pulls phrases from the local endpoint as they are synthesized
+                stream_url = get_radio_stream_server().register(
+                    lambda: radio.iter_episode(target_df, synthesize, workers=workers)
+                )
+                st.markdown(radio_player_html(stream_url), unsafe_allow_html=True)
+                st.info("↑ 最初のフレーズが生成され次第、再生できます。")
+            else:
+                generate_radio_inline(target_df, synthesize, workers)
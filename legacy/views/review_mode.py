@@ -0,0 +1,119 @@
+"""
+Review Mode page: due cards one at a time (SM-2), in a fragment so answering a
+card reruns only the card, with the next batch prefetched in the background.
+"""
+#%%
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+import database as db
+import scheduler
+import youtube
+
+#%%
+REVIEW_PREFETCH_AT = 10  # cards left in the session's queue when the next batch is fetched
+
+@st.cache_resource
+def get_prefetch_pool():
+    """Threads that fetch the next batch of due cards while the current one is reviewed"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="review-prefetch")
+
+def review_state(user_id):
+    """This session's review queue: cards still to show, ids already taken, pending prefetch"""
+    state = st.session_state.get("review")
+    if state is None or state["user_id"] != user_id:
+        state = st.session_state["review"] = {
+            "user_id": user_id,
+            "queue": deque(),
+            "seen": set(),
+            "prefetch": None,
+            "more": True,
+            "done": 0,
+            "toast": None,
+        }
+    return state
+
+def _take_cards(state, df):
+    """Append cards from a due-queue fetch that this session hasn't shown yet"""
+    limit = db.PAGE_SIZE + REVIEW_PREFETCH_AT
+    state["more"] = len(df) >= limit
+    for card in df.to_dict("records") if not df.empty else []:
+        if card["id"] not in state["seen"]:
+            state["seen"].add(card["id"])
+            state["queue"].append(card)
+
+def fill_review_queue(state):
+    """Top up the queue from the background prefetch, fetching inline only when empty"""
+    limit = db.PAGE_SIZE + REVIEW_PREFETCH_AT
+    future = state["prefetch"]
+    if future is not None and (future.done() or not state["queue"]):
+        state["prefetch"] = None
+        _take_cards(state, future.result())
+    if not state["queue"] and state["more"]:
+        _take_cards(state, db.get_due_phrases(state["user_id"], limit))
+    if len(state["queue"]) <= REVIEW_PREFETCH_AT and state["prefetch"] is None and state["more"]:
+        # Rated cards are rescheduled and learned ones hidden, so the top of the due
+        # queue is the next batch; `seen` drops the cards still waiting in this session
+        state["prefetch"] = get_prefetch_pool().submit(db.get_due_phrases, state["user_id"], limit)
+
+def _finish_card(state, action, *args):
+    """Button callback: record the answer for the front card and move to the next one"""
+    card = state["queue"].popleft()
+    if action == "learned":
+        db.queue_mark_as_learned(card["id"], state["user_id"])
+        # Shown by the fragment: callbacks of a fragment rerun can't display elements
+        state["toast"] = f"✅ {card['phrase']}"
+    else:
+        db.rate_phrase(card, state["user_id"], *args)
+    state["done"] += 1
+
+def video_link(row):
+    """YouTube URL of a phrase, jumping to its timestamp (precomputed at write time)"""
+    link = row.get('video_link')
+    if isinstance(link, str) and link:
+        return link
+    # Rows written before video_link existed (NULL, or NaN once in a DataFrame)
+    return youtube.deep_link(row['youtube_url'], row['timestamp'])
+
+@st.fragment
+def review_card(user_id):
+    """One card at a time; answering reruns only this fragment, never the whole page"""
+    state = review_state(user_id)
+    if state["toast"]:
+        st.toast(state["toast"])
+        state["toast"] = None
+    fill_review_queue(state)
+    
+    if not state["queue"]:
+        if db.pending_write_count(user_id):
+            db.flush_writes(user_id)
+        st.success("🎉 No phrases due for review! Come back later.")
+        if st.button("🔄 Check again"):
+            del st.session_state["review"]
+            st.rerun(scope="fragment")
+        return
+    
+    card = state["queue"][0]
+    left = f"{len(state['queue'])}{'+' if state['more'] else ''}"
+    st.caption(f"Reviewed: {state['done']} · Due: {left}")
+    with st.container(border=True):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.subheader(card['phrase'])
+            st.write(f"**Meaning:** {card['meaning']}")
+            if card['youtube_url']:
+                st.markdown(f"[Watch Video]({video_link(card)})", unsafe_allow_html=True)
+        with col2:
+            st.button("✅ Learned", key="review_learned", use_container_width=True,
+                      on_click=_finish_card, args=(state, "learned"))
+        for col, (label, quality) in zip(st.columns(len(scheduler.RATINGS)), scheduler.RATINGS.items()):
+            with col:
+                st.button(label.capitalize(), key=f"review_{label}", use_container_width=True,
+                          on_click=_finish_card, args=(state, "rate", quality))
+
+#%%
+def render(user_id):
+    """The due queue, one card at a time"""
+    st.header("Review Mode (Due)")
+    st.caption("Rate each phrase to schedule its next review, or mark it as learned to retire it.")
+    review_card(user_id)
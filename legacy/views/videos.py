@@ -0,0 +1,29 @@
+"""
+Videos page: the phrases clipped from one YouTube video, in timestamp order.
+"""
+#%%
+import streamlit as st
+import database as db
+import youtube
+
+#%%
+def render(user_id):
+    """Pick a video, play it and list its phrases with deep links"""
+    st.header("Videos 🎬")
+    videos = db.get_videos(user_id)
+    if videos.empty:
+        st.info("No phrases with a YouTube link yet.")
+    else:
+        counts = dict(zip(videos["video_id"], videos["phrases"]))
+        video_id = st.selectbox(
+            "Video", videos["video_id"],
+            format_func=lambda v: f"{v} ({counts[v]} phrases)",
+        )
+        st.video(youtube.WATCH_URL + video_id)
+        df = db.get_video_phrases(user_id, video_id)
+        if not df.empty:
+            st.dataframe(
+                df[["timestamp", "phrase", "meaning", "is_learned", "video_link"]],
+                hide_index=True,
+                column_config={"video_link": st.column_config.LinkColumn("Watch", display_text="▶")},
+            )
@@ -0,0 +1,88 @@
+"""
+Write-behind queue for per-phrase mutations.
+Review Mode marks phrases one click at a time; instead of a backend round trip per
+click, ids are collected per operation and applied as one bulk call when
+max_pending ids are queued, max_delay seconds have passed, or flush() is called.
+"""
+#%%
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ("learned", "delete")
+
+#%%
+class WriteBehindQueue:
+    """Coalesces phrase ids per operation and hands them to apply(op, ids) in bulk"""
+
+    def __init__(self, apply, max_pending=20, max_delay=5.0):
+        self.apply = apply
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self._pending = {op: set() for op in OPERATIONS}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, op, phrase_id):
+        """Queue phrase_id for op; flushes right away once max_pending is reached"""
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        with self._lock:
+            self._pending[op].add(int(phrase_id))
+            if op == "delete":
+                # Deleting supersedes a queued learned update
+                self._pending["learned"].discard(int(phrase_id))
+            full = sum(len(ids) for ids in self._pending.values()) >= self.max_pending
+            if not full:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def pending(self):
+        """Return a snapshot {op: frozenset(ids)} of writes not yet applied"""
+        with self._lock:
+            return {op: frozenset(ids) for op, ids in self._pending.items()}
+
+    def flush(self):
+        """Apply every pending write now (one call per non-empty operation).
+        If an apply fails, its ids and those of every batch not yet applied are put
+        back and the timer is re-armed, so they are retried without a new enqueue."""
+        with self._lock:
+            batches = [(op, ids) for op, ids in self._pending.items() if ids]
+            self._pending = {op: set() for op in OPERATIONS}
+            self._cancel_timer()
+        for done, (op, ids) in enumerate(batches):
+            try:
+                self.apply(op, sorted(ids))
+            except Exception:
+                self._requeue(batches[done:])
+                raise
+
+    def _requeue(self, batches):
+        with self._lock:
+            for op, ids in batches:
+                self._pending[op] |= ids
+            # A delete queued while flushing still supersedes a learned update
+            self._pending["learned"] -= self._pending["delete"]
+            self._start_timer()
+
+    def _start_timer(self):
+        """Arm the max_delay timer unless it is already running (caller holds the lock)"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Write-behind flush failed; retrying in %.1fs", self.max_delay)
@@ -0,0 +1,46 @@
+"""
+YouTube links for phrases.
+Phrases store the URL they were clipped from plus a start time in seconds. At write
+time the backends also store the canonical 11-character video id (so phrases can be
+grouped and listed per video from an index) and the deep link that opens the video
+at the phrase, so rendering a card never parses URLs.
+
+Recognized: youtube.com/watch?v=ID (any position of v=), youtu.be/ID, and the
+/embed/, /shorts/, /live/ and /v/ paths, on www., m., music. and youtube-nocookie.com.
+Other URLs get no video id; their link is the URL with a t= parameter appended.
+"""
+#%%
+import re
+import pandas as pd
+
+WATCH_URL = "https://www.youtube.com/watch?v="
+
+_VIDEO_ID = re.compile(
+    r"(?:youtu\.be/|youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#\s]*&)?v=|embed/|shorts/|live/|v/))"
+    r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+
+#%%
+def video_ids(urls):
+    """Canonical video id for every URL in a Series ("" when it isn't a YouTube video)"""
+    urls = pd.Series(urls, dtype=object).fillna("").astype(str)
+    return urls.str.extract(_VIDEO_ID, expand=False).fillna("").astype(object)
+
+def deep_links(urls, timestamps, ids=None):
+    """Link opening each video at its timestamp, vectorized over aligned Series.
+    Videos get a canonical watch URL; other URLs are kept and get ?t=/&t= appended."""
+    urls = pd.Series(urls, dtype=object).fillna("").astype(str)
+    timestamps = pd.Series(timestamps, index=urls.index).fillna(0).astype(int)
+    ids = video_ids(urls) if ids is None else pd.Series(ids, index=urls.index)
+    links = urls.where(ids == "", WATCH_URL + ids)
+    separator = links.str.contains("?", regex=False).map({True: "&t=", False: "?t="})
+    with_time = (timestamps > 0) & (links != "")
+    return links.where(~with_time, links + separator + timestamps.astype(str)).astype(object)
+
+def video_id(url):
+    """Scalar version of video_ids"""
+    return video_ids([url]).iat[0]
+
+def deep_link(url, timestamp=0):
+    """Scalar version of deep_links"""
+    return deep_links([url], [timestamp or 0]).iat[0]
@@ -0,0 +1,155 @@
+"""
+Backfill derived columns of existing rows in the hosted (Supabase) phrases table:
+content_hash, and video_id/video_link.
+
+Rows added before content_hash existed have a NULL hash, and NULLs never conflict
+in the unique (user_id, content_hash) index, so re-importing a file would insert a
+second copy of each of them. Run this after adding the column and BEFORE creating
+the index (see supabase_backend's docstring):
+
+1. the stored hashes are read and checked for duplicates per user: if any, the
+   unique index can't be created until those rows are merged or deleted
+2. rows with a NULL hash get importer.content_hash() of their phrase and meaning,
+   in id order, sent back in --batch-size upserts keyed on id. A row with the
+   same content as one before it keeps a NULL hash (as in the SQLite migration),
+   so no user data is touched; the script reports how many did.
+   In the same pass, rows without a video_link get the canonical video id and
+   deep link (youtube.py) that add_phrase and imports write for new rows.
+
+Only rows still missing a value are read in step 2, so an interrupted run picks up
+where it stopped when started again.
+
+Usage:
+    python scripts/backfill_supabase.py                  # credentials as for sync_db.py
+    python scripts/backfill_supabase.py --dry-run        # report only, write nothing
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "legacy"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import importer  # noqa: E402
+import youtube  # noqa: E402
+from sync_db import SECRETS_FILE, open_endpoint  # noqa: E402
+
+DEFAULT_BATCH_SIZE = 1000  # rows per read and per upsert request (the API's default cap)
+
+#%%
+def read_pages(query, batch_size):
+    """Yield DataFrames of query's rows in id order, keyset-paginated on id.
+    query(last_id) returns a PostgREST builder, already filtered."""
+    last_id = 0
+    while True:
+        result = query(last_id).order("id").limit(batch_size).execute()
+        if not result.data:
+            return
+        df = pd.DataFrame(result.data)
+        yield df
+        if len(df) < batch_size:
+            return
+        last_id = int(df["id"].iat[-1])
+
+def stored_hashes(client, batch_size):
+    """{(user_id, content_hash)} already stored, and the duplicated ones among them"""
+    seen, duplicated = set(), set()
+    pages = read_pages(lambda last_id: client.table("phrases").select(
+        "id, user_id, content_hash"
+    ).not_.is_("content_hash", "null").gt("id", last_id), batch_size)
+    for df in pages:
+        for key in zip(df["user_id"].tolist(), df["content_hash"].tolist()):
+            (duplicated if key in seen else seen).add(key)
+    return seen, duplicated
+
+def plan_hashes(rows, seen):
+    """Hash rows (id, user_id, phrase, meaning) in order; returns (rows to update with
+    their content_hash, number left NULL as duplicates). seen is updated in place."""
+    hashes = importer.content_hashes(
+        rows["phrase"].fillna("").astype(str), rows["meaning"].fillna("").astype(str)
+    )
+    keep = []
+    for key in zip(rows["user_id"].tolist(), hashes.tolist()):
+        keep.append(key not in seen)
+        seen.add(key)
+    return rows.assign(content_hash=hashes)[keep], len(keep) - sum(keep)
+
+def plan_videos(rows):
+    """video_id and video_link of rows (youtube_url, timestamp) without a video_link"""
+    rows = rows[rows["video_link"].isna()]
+    ids = youtube.video_ids(rows["youtube_url"])
+    links = youtube.deep_links(rows["youtube_url"], rows["timestamp"], ids)
+    return rows.assign(video_id=ids, video_link=links)
+
+def plan_updates(rows, seen):
+    """One page of step 2 -> (update records, hashed, duplicates, linked)"""
+    hashes, duplicates = plan_hashes(rows[rows["content_hash"].isna()], seen)
+    videos = plan_videos(rows)
+    updates = rows[["id", "user_id", "phrase"]].join(
+        hashes[["content_hash"]]
+    ).join(videos[["video_id", "video_link"]])
+    updates = updates[updates.index.isin(hashes.index) | updates.index.isin(videos.index)]
+    # Columns a row doesn't need are sent with their stored values
+    updates["content_hash"] = updates["content_hash"].fillna(rows["content_hash"])
+    updates["video_id"] = updates["video_id"].fillna(rows["video_id"])
+    updates["video_link"] = updates["video_link"].fillna(rows["video_link"])
+    records = updates.astype(object).where(updates.notna(), None).to_dict("records")
+    return records, len(hashes), duplicates, len(videos)
+
+def backfill(client, seen, batch_size, dry_run=False):
+    """Step 2; returns (rows hashed, rows left NULL as duplicates, rows linked)"""
+    hashed = duplicates = linked = 0
+    started = time.perf_counter()
+    pages = read_pages(lambda last_id: client.table("phrases").select(
+        "id, user_id, phrase, meaning, youtube_url, timestamp, content_hash, video_id, video_link"
+    ).or_("content_hash.is.null,video_link.is.null").gt("id", last_id), batch_size)
+    for rows in pages:
+        records, page_hashed, page_duplicates, page_linked = plan_updates(rows, seen)
+        if not dry_run and records:
+            # Keyed on id, so every row is an update; user_id and phrase are sent
+            # because Postgres checks NOT NULL columns before it sees the conflict
+            client.table("phrases").upsert(records, on_conflict="id").execute()
+        hashed += page_hashed
+        duplicates += page_duplicates
+        linked += page_linked
+        rate = len(rows) / max(time.perf_counter() - started, 1e-9)
+        print(f"  hashed {hashed}, duplicates {duplicates}, linked {linked} ({rate:.0f} rows/s)")
+    return hashed, duplicates, linked
+
+#%%
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backfill content_hash and video_id/video_link in the hosted phrases table")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="rows per read and per update request")
+    parser.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    parser.add_argument("--secrets", default=SECRETS_FILE,
+                        help="secrets.toml with [supabase] url/key (if not in the environment)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    client = open_endpoint("supabase", args.secrets).client
+
+    print("Checking stored content hashes...")
+    seen, duplicated = stored_hashes(client, args.batch_size)
+    if duplicated:
+        print(f"⚠️ {len(duplicated)} (user_id, content_hash) pairs are stored more than once; "
+              "merge or delete those rows before creating the unique index.")
+
+    print("Filling in content hashes and video links...")
+    hashed, duplicates, linked = backfill(client, seen, args.batch_size, args.dry_run)
+    print(f"✅ {'would hash' if args.dry_run else 'hashed'} {hashed} rows "
+          f"({duplicates} duplicates of an earlier row keep a NULL hash), "
+          f"{'would link' if args.dry_run else 'linked'} {linked} rows")
+    if not duplicated and not args.dry_run:
+        print("The unique index can now be created:\n"
+              "    create unique index if not exists idx_phrases_user_content_hash\n"
+              "        on phrases (user_id, content_hash);")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Offline benchmark for the data and audio hot paths.
+Runs against the local SQLite backend (a fresh temporary database) and the offline
+"silent" TTS engine, with synthetic users built from the rows of the examples/ CSV.
+
+Usage:
+    python scripts/benchmark.py                          # 1k / 10k / 100k phrases
+    python scripts/benchmark.py --sizes 1000 --output bench.json
+    python scripts/benchmark.py --compare old.json       # print ratios vs. an earlier run
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "legacy"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+import sqlite_backend  # noqa: E402
+import radio  # noqa: E402
+from tts_cache import AudioCache  # noqa: E402
+from tts_engines import SilentEngine  # noqa: E402
+import clean_csv  # noqa: E402
+
+EXAMPLE_CSV = os.path.join(ROOT, "examples", "_英語の脳を作る・シャドーイング練習530 – 中級編 - シート1.csv")
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+MARK_SAMPLE = 1000      # mark_as_learned calls timed per size
+RADIO_PHRASES = 50      # phrases per Radio Mode episode
+
+#%%
+def load_example_rows():
+    """Return the example CSV as a DataFrame with 'phrase' and 'meaning' columns"""
+    df = pd.read_csv(EXAMPLE_CSV)
+    return df.rename(columns={df.columns[1]: "phrase", df.columns[2]: "meaning"})
+
+def synthetic_phrases(example, size):
+    """Cycle the example rows up to `size` rows, made unique so dedup doesn't drop them"""
+    df = example.iloc[[i % len(example) for i in range(size)]].reset_index(drop=True)
+    suffix = " #" + df.index.astype(str)
+    df["phrase"] = df["phrase"].astype(str) + suffix
+    df["meaning"] = df["meaning"].astype(str) + suffix
+    return df
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def result_entry(seconds, rows):
+    return {
+        "seconds": round(seconds, 6),
+        "rows": rows,
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+    }
+
+#%%
+def bench_size(example, size, tts_latency, tts_workers):
+    """Run every benchmark for one library size; returns {name: result_entry}"""
+    results = {}
+    sqlite_backend.configure(os.path.join(tempfile.mkdtemp(prefix="bench-"), "bench.db"))
+    user_id = 1
+    df = synthetic_phrases(example, size)
+
+    seconds, report = timed(sqlite_backend.import_phrases_from_df, user_id, df)
+    results["import_phrases_from_df"] = result_entry(seconds, report.inserted)
+
+    seconds, unlearned = timed(sqlite_backend.get_unlearned_phrases, user_id)
+    results["get_unlearned_phrases"] = result_entry(seconds, len(unlearned))
+
+    seconds, everything = timed(sqlite_backend.get_all_phrases, user_id)
+    results["get_all_phrases"] = result_entry(seconds, len(everything))
+
+    ids = unlearned["id"].head(MARK_SAMPLE).tolist()
+    start = time.perf_counter()
+    for phrase_id in ids:
+        sqlite_backend.mark_as_learned(phrase_id, user_id)
+    results["mark_as_learned"] = result_entry(time.perf_counter() - start, len(ids))
+
+    raw = example.iloc[[i % len(example) for i in range(size)]].reset_index(drop=True)
+    seconds, _ = timed(clean_csv.clean_dataframe, raw.copy())
+    results["clean_csv"] = result_entry(seconds, size)
+
+    episode = unlearned.head(RADIO_PHRASES)
+    engine = SilentEngine(latency=tts_latency, max_concurrency=tts_workers)
+    synthesize = engine.synthesize
+    seconds, audio = timed(radio.build_episode, episode, synthesize, workers=tts_workers)
+    results["radio_build_episode"] = dict(result_entry(seconds, len(episode)), bytes=len(audio))
+
+    # Same episode twice through the on-disk audio cache: the second run is all hits
+    audio_cache = AudioCache(tempfile.mkdtemp(prefix="bench-tts-"))
+    cached = audio_cache.wrap(synthesize, engine.settings)
+    radio.build_episode(episode, cached, workers=tts_workers)
+    seconds, audio = timed(radio.build_episode, episode, cached, workers=tts_workers)
+    results["radio_build_episode_cached"] = dict(
+        result_entry(seconds, len(episode)), bytes=len(audio), hit_rate=audio_cache.stats()["hit_rate"]
+    )
+
+    sqlite_backend.close_connections()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+def compare(current, previous):
+    """Print seconds ratio (current / previous) for every benchmark present in both runs"""
+    print(f"{'size':>8} {'benchmark':<26} {'before':>10} {'after':>10} {'ratio':>7}")
+    for size, benches in current["results"].items():
+        for name, entry in benches.items():
+            old = previous.get("results", {}).get(size, {}).get(name)
+            if not old:
+                continue
+            ratio = entry["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+            print(f"{size:>8} {name:<26} {old['seconds']:>10.4f} {entry['seconds']:>10.4f} {ratio:>7.2f}")
+
+#%%
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="phrases per synthetic user")
+    parser.add_argument("--tts-latency-ms", type=float, default=0.0, help="simulated latency per TTS call")
+    parser.add_argument("--tts-workers", type=int, default=radio.DEFAULT_WORKERS, help="Radio Mode synthesis threads")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    example = load_example_rows()
+    output = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "sqlite": sqlite_backend.sqlite3.sqlite_version,
+        "tts_latency_ms": args.tts_latency_ms,
+        "tts_workers": args.tts_workers,
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} phrases...", file=sys.stderr)
+        output["results"][str(size)] = bench_size(example, size, args.tts_latency_ms / 1000, args.tts_workers)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(output, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,206 @@
 """
-CSVファイルから [1] や [1, 3] などの参照番号を削除するスクリプト
-Usage: python scripts/clean_csv.py
+CSVファイルを normalize.py のルールで整形するスクリプト
+（[1] や [1, 3] などの参照番号、全角英数字、カーブした引用符、余分な空白）
+
+ファイルは chunksize 行ずつ読み書きするので、数 GB のファイルでもメモリ使用量は一定です。
+--jobs を指定するとチャンク（複数ファイルの場合はファイルをまたいで）を複数プロセスで処理します。
+
+Usage:
+    python scripts/clean_csv.py                               # examples/ のサンプルを整形
+    python scripts/clean_csv.py data/*.csv --jobs 4           # 各ファイルの横に *_cleaned.csv を出力
+    python scripts/clean_csv.py export.csv -o cleaned.csv --chunksize 100000
+    python scripts/clean_csv.py "exports/**/*.csv" -o out/    # 出力先ディレクトリ
 """
-import pandas as pd
-import re
+import argparse
+import codecs
+import glob
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legacy"))
+from normalize import normalize_frame, normalize_text  # noqa: E402
 
 INPUT_FILE = "examples/_英語の脳を作る・シャドーイング練習530 – 中級編 - シート1.csv"
-OUTPUT_FILE = "examples/_英語の脳を作る・シャドーイング練習530 – 中級編 - シート1_cleaned.csv"
+
+CLEANED_SUFFIX = "_cleaned"
+OUTPUT_ENCODING = "utf-8-sig"   # Excel で文字化けしないよう BOM 付き
+DEFAULT_CHUNKSIZE = 50000       # 1 チャンクの行数
+SNIFF_BYTES = 1 << 20           # 文字コード判定に読む先頭バイト数
+FALLBACK_ENCODING = "cp932"     # UTF-8 として読めない場合（日本語版 Excel の出力）
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
 
 def clean_text(text):
-    """[1] や [1, 3] などの参照番号を削除する"""
+    """1セル分を整形する（欠損値はそのまま）"""
     if pd.isna(text):
         return text
-    # [数字] や [数字, 数字] などのパターンを削除
-    cleaned = re.sub(r'\s*\[\d+(?:,\s*\d+)*\]\s*', '', str(text))
-    return cleaned.strip()
-
-def main():
-    print(f"読み込み中: {INPUT_FILE}")
-    df = pd.read_csv(INPUT_FILE)
-    
-    print(f"処理前の行数: {len(df)}")
-    print("処理前のサンプル:")
-    print(df.head(3).to_string())
-    print()
-    
-    # 全列に対してクリーニングを適用
-    for col in df.columns:
-        df[col] = df[col].apply(clean_text)
-    
-    # 保存
-    df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8-sig')
-    
-    print(f"処理後のサンプル:")
-    print(df.head(3).to_string())
-    print()
-    print(f"✅ 完了！保存先: {OUTPUT_FILE}")
+    return normalize_text(text)
+
+def clean_dataframe(df):
+    """文字列の列をまとめて（pandas の .str でベクトル化して）整形した DataFrame を返す"""
+    return normalize_frame(df)
+
+#%%
+def detect_encoding(path):
+    """BOM を見て、なければ先頭を UTF-8 として読めるか試して文字コードを決める"""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        # final=False: 末尾で途切れたマルチバイト文字はエラーにしない
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+def clean_chunk(df):
+    """1チャンクを整形し (整形後の DataFrame, 変更されたセル数) を返す（ワーカープロセスで実行）"""
+    cleaned = normalize_frame(df, columns=df.columns)
+    changed = int((cleaned != df).to_numpy().sum())
+    return cleaned, changed
+
+#%%
+@dataclass
+class FileSummary:
+    path: str
+    output: str
+    encoding: str
+    rows: int = 0
+    cells_changed: int = 0
+    seconds: float = 0.0
+
+def expand_inputs(patterns):
+    """パスとグロブを展開する。グロブで見つかった *_cleaned.csv（前回の出力）は除く"""
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            paths.extend(p for p in matches
+                         if not os.path.splitext(p)[0].endswith(CLEANED_SUFFIX))
+        else:
+            paths.append(pattern)
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        raise SystemExit(f"ファイルが見つかりません: {', '.join(missing)}")
+    return list(dict.fromkeys(paths))
+
+def output_path(path, output, single):
+    """出力ファイル名: -o がファイル名ならそれ、ディレクトリならその中、省略時は入力の横"""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    name = f"{stem}{CLEANED_SUFFIX}{ext or '.csv'}"
+    if output is None:
+        return os.path.join(os.path.dirname(path), name)
+    if single and not os.path.isdir(output) and not output.endswith(os.sep):
+        return output
+    os.makedirs(output, exist_ok=True)
+    return os.path.join(output, name)
+
+def read_chunks(summaries, chunksize, started):
+    """全ファイルのチャンクを順に (ファイル番号, DataFrame) で返す"""
+    for index, summary in enumerate(summaries):
+        started[index] = time.perf_counter()
+        # 全列を文字列のまま読む: 数値や空欄を書き戻すときに形が変わらないように
+        reader = pd.read_csv(
+            summary.path, encoding=summary.encoding, chunksize=chunksize,
+            dtype=str, keep_default_na=False,
+        )
+        with reader:
+            for chunk in reader:
+                yield index, chunk
+
+def clean_files(paths, output=None, chunksize=DEFAULT_CHUNKSIZE, jobs=1, encoding=None):
+    """paths を整形して書き出し、ファイルごとの FileSummary のリストを返す"""
+    summaries = [
+        FileSummary(path, output_path(path, output, len(paths) == 1), encoding or detect_encoding(path))
+        for path in paths
+    ]
+    writers = {}  # ファイル番号 -> 出力ファイル（最初のチャンクで開く）
+    started = {}  # ファイル番号 -> 読み込み開始時刻
+
+    def write(index, cleaned, changed):
+        summary = summaries[index]
+        if index not in writers:
+            for done in list(writers):  # チャンクは順番に届くので、前のファイルは書き終わっている
+                finish(done)
+            writers[index] = open(summary.output, "w", encoding=OUTPUT_ENCODING, newline="")
+            cleaned.to_csv(writers[index], index=False)
+        else:
+            cleaned.to_csv(writers[index], index=False, header=False)
+        summary.rows += len(cleaned)
+        summary.cells_changed += changed
+
+    def finish(index):
+        writers.pop(index).close()
+        summaries[index].seconds = time.perf_counter() - started[index]
+
+    chunks = read_chunks(summaries, chunksize, started)
+    if jobs <= 1:
+        for index, chunk in chunks:
+            write(index, *clean_chunk(chunk))
+    else:
+        # 先読みは jobs * 2 チャンクまで: 読み込みが処理より速くてもメモリは増えない
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            in_flight = deque()
+            for index, chunk in chunks:
+                in_flight.append((index, pool.submit(clean_chunk, chunk)))
+                if len(in_flight) >= jobs * 2:
+                    index, future = in_flight.popleft()
+                    write(index, *future.result())
+            while in_flight:
+                index, future = in_flight.popleft()
+                write(index, *future.result())
+    for index in list(writers):
+        finish(index)
+
+    # 空のファイル（ヘッダーのみ）も出力を作る
+    for summary in summaries:
+        if summary.rows == 0 and not os.path.exists(summary.output):
+            header = pd.read_csv(summary.path, encoding=summary.encoding, nrows=0, dtype=str)
+            header.to_csv(summary.output, index=False, encoding=OUTPUT_ENCODING)
+    return summaries
+
+#%%
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CSV の参照番号・全角文字・引用符・空白を整形する")
+    parser.add_argument("inputs", nargs="*", default=[INPUT_FILE],
+                        help="入力 CSV のパスまたはグロブ（例: 'data/**/*.csv'）")
+    parser.add_argument("-o", "--output",
+                        help="出力ファイル（入力が1つの場合）またはディレクトリ。省略時は入力の横に *_cleaned.csv")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="一度に読み込む行数")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="並列プロセス数（0 で CPU コア数）")
+    parser.add_argument("--encoding",
+                        help="入力の文字コード（省略時は BOM と UTF-8 判定で自動検出）")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = expand_inputs(args.inputs)
+    jobs = args.jobs or os.cpu_count() or 1
+    print(f"{len(paths)} ファイルを整形します（chunksize={args.chunksize}, jobs={jobs}）")
+
+    summaries = clean_files(paths, args.output, args.chunksize, jobs, args.encoding)
+
+    for summary in summaries:
+        print(
+            f"✅ {summary.path} [{summary.encoding}] -> {summary.output}: "
+            f"{summary.rows} 行, 変更セル {summary.cells_changed}, {summary.seconds:.2f} 秒"
+        )
+    print(f"完了！合計 {sum(s.rows for s in summaries)} 行, "
+          f"変更セル {sum(s.cells_changed for s in summaries)}")
 
 if __name__ == "__main__":
     main()
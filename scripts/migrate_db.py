@@ -1,100 +1,67 @@
 """
-Database migration script to add user support to existing database
+Apply the versioned schema migrations (legacy/migrations.py) to the SQLite database.
+
+The app creates a new database itself but refuses to start on one that misses
+migrations, since their backfills rewrite whole tables: run this first. Each
+data-moving step works in short, checkpointed batches, so the script is safe to
+interrupt and run again, and the app can keep using the database meanwhile.
+
+Usage:
+    python scripts/migrate_db.py                          # legacy/phrases.db
+    python scripts/migrate_db.py --db phrases.db --batch-size 20000
+    python scripts/migrate_db.py --status
 """
-import sqlite3
+import argparse
+import logging
 import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "legacy"))
+
+import migrations  # noqa: E402
 
-DB_NAME = "phrases.db"
+DB_NAME = os.path.join(ROOT, "legacy", "phrases.db")
 
-def migrate_database():
-    """Migrate existing database to support multi-user"""
-    
-    if not os.path.exists(DB_NAME):
+#%%
+def print_status(path=DB_NAME):
+    conn = migrations.connect(path)
+    try:
+        applied = {row[0]: row for row in conn.execute(migrations.SQL_APPLIED)}
+        for migration in migrations.MIGRATIONS:
+            if migration.version in applied:
+                state = f"applied {applied[migration.version][2]}"
+            else:
+                checkpoint = conn.execute(migrations.SQL_CHECKPOINT, (migration.version,)).fetchone()
+                state = f"in progress (after id {checkpoint[0]})" if checkpoint else "pending"
+            print(f"[{migration.version}] {migration.name}: {state}")
+    finally:
+        conn.close()
+
+#%%
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--db", default=DB_NAME, help="SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=migrations.DEFAULT_BATCH_SIZE,
+                        help="rows copied or backfilled per transaction")
+    parser.add_argument("--status", action="store_true",
+                        help="show applied and pending migrations, then exit")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
         print("No existing database found. Run the app to create a new one.")
         return
-    
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    
-    # Check if users table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'")
-    if not c.fetchone():
-        print("Creating users table...")
-        c.execute('''
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create a default user for existing data
-        import hashlib
-        default_password = hashlib.sha256("password123".encode()).hexdigest()
-        c.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', 
-                  ('default_user', default_password))
-        default_user_id = c.lastrowid
-        print(f"Created default user (username: 'default_user', password: 'password123')")
-    else:
-        # Get the first user ID
-        c.execute('SELECT id FROM users LIMIT 1')
-        result = c.fetchone()
-        if result:
-            default_user_id = result[0]
-        else:
-            print("Error: Users table exists but no users found!")
-            conn.close()
-            return
-    
-    # Check if user_id column exists in phrases table
-    c.execute("PRAGMA table_info(phrases)")
-    columns = [column[1] for column in c.fetchall()]
-    
-    if 'user_id' not in columns:
-        print("Adding user_id column to phrases table...")
-        
-        # SQLite doesn't support adding foreign keys to existing tables easily
-        # So we need to recreate the table
-        
-        # 1. Rename old table
-        c.execute('ALTER TABLE phrases RENAME TO phrases_old')
-        
-        # 2. Create new table with user_id
-        c.execute('''
-            CREATE TABLE phrases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                phrase TEXT NOT NULL,
-                meaning TEXT,
-                youtube_url TEXT,
-                timestamp INTEGER,
-                is_learned BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # 3. Copy data from old table to new table (assign to default user)
-        c.execute(f'''
-            INSERT INTO phrases (id, user_id, phrase, meaning, youtube_url, timestamp, is_learned, created_at)
-            SELECT id, {default_user_id}, phrase, meaning, youtube_url, timestamp, is_learned, created_at
-            FROM phrases_old
-        ''')
-        
-        # 4. Drop old table
-        c.execute('DROP TABLE phrases_old')
-        
-        print(f"Migration complete! All existing phrases assigned to user ID {default_user_id}")
+    if args.status:
+        print_status(args.db)
+        return
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    applied = migrations.migrate_database(args.db, args.batch_size)
+    if applied:
+        print("\n✅ Migration successful!")
     else:
-        print("Database already has user_id column. No migration needed.")
-    
-    conn.commit()
-    conn.close()
-    print("\n✅ Migration successful!")
-    print("You can now log in with:")
-    print("  Username: default_user")
-    print("  Password: password123")
+        print("Database is up to date. No migration needed.")
 
 if __name__ == "__main__":
-    migrate_database()
+    main()
@@ -0,0 +1,432 @@
+"""
+Copy phrases between the SQLite database and the hosted (Supabase) tables.
+
+    python scripts/sync_db.py SOURCE DEST --user SRC[:DST] [--user ...] [options]
+
+SOURCE and DEST are "supabase" or a SQLite file ("sqlite:path" or any path ending in
+.db). Both ends may be SQLite files, so a sync (or an export into a fresh file) can
+be rehearsed against a local stand-in before it touches the hosted project.
+
+- rows are streamed in --chunk-size keyset pages ordered by (created_at, id), so
+  memory stays flat whatever the size of the source
+- --user maps a source user_id to a destination user_id (the same id if DST is left
+  out); the destination user must already exist (checked before anything is copied)
+- a SQLite source is opened read-only: syncing never writes to it, not even a
+  schema upgrade
+- chunks are written by --workers threads, with at most 2 x workers chunks in flight
+- rows are upserted on the destination's unique (user_id, content_hash) index, so
+  re-sending a row updates it instead of duplicating it; content hash, MinHash
+  signature and video id/link are recomputed from the row. Rows of a chunk with the
+  same content are collapsed into the first one (reported), since one upsert can't
+  hit the same index entry twice
+- progress is checkpointed in a SQLite state file (--state) after every chunk, in
+  source order, so an interrupted sync resumes after the last chunk fully written
+- --incremental only sends rows that are new (past the last completed sync's
+  (created_at, id) watermark, or never sent) or changed since they were last sent
+  (a digest of their progress, schedule and video fields, kept in the state file);
+  --new-only skips the change scan and reads only past the watermark
+
+Deletions are not propagated: phrases removed at the source stay at the destination.
+
+Examples:
+    python scripts/sync_db.py legacy/phrases.db supabase --user 1:7 --workers 4
+    python scripts/sync_db.py supabase backup.db --user 7:1 --incremental
+    python scripts/sync_db.py legacy/phrases.db /tmp/standin.db --user 1:2   # rehearsal
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "legacy"))
+
+import importer  # noqa: E402
+import migrations  # noqa: E402
+import near_duplicates  # noqa: E402
+import scheduler  # noqa: E402
+import sqlite_backend  # noqa: E402
+import youtube  # noqa: E402
+
+SECRETS_FILE = os.path.join(ROOT, "legacy", ".streamlit", "secrets.toml")
+STATE_FILE = "sync_state.db"
+
+DEFAULT_CHUNK_SIZE = 1000  # rows per read and per upsert request
+DEFAULT_WORKERS = 4
+
+# Columns carried from source to destination (id and user_id are not: the
+# destination assigns its own ids and user_id comes from the --user mapping)
+SYNC_COLUMNS = [
+    "phrase", "meaning", "youtube_url", "timestamp", "is_learned", "created_at",
+    "due_at", "interval_days", "ease", "repetitions",
+]
+# Columns that can change after a phrase is added; their digest detects changed rows
+MUTABLE_COLUMNS = [
+    "youtube_url", "timestamp", "is_learned", "due_at", "interval_days", "ease", "repetitions",
+]
+# Written by the destination, derived from the row in prepare_rows
+DERIVED_COLUMNS = ["content_hash", "minhash", "video_id", "video_link"]
+
+#%%
+def prepare_rows(df):
+    """Source rows -> id and SYNC_COLUMNS with defaults filled in"""
+    out = df.reindex(columns=["id", *SYNC_COLUMNS]).copy()
+    out["id"] = out["id"].astype(int)
+    for column in ("phrase", "meaning", "youtube_url"):
+        out[column] = out[column].fillna("").astype(str)
+    out["timestamp"] = pd.to_numeric(out["timestamp"], errors="coerce").fillna(0).astype(int)
+    out["is_learned"] = out["is_learned"].fillna(False).astype(bool)
+    out["created_at"] = out["created_at"].astype(str)
+    out["due_at"] = out["due_at"].fillna(out["created_at"]).astype(str)
+    out["interval_days"] = pd.to_numeric(out["interval_days"], errors="coerce").fillna(0).astype(float)
+    out["ease"] = pd.to_numeric(out["ease"], errors="coerce").fillna(scheduler.DEFAULT_EASE).astype(float)
+    out["repetitions"] = pd.to_numeric(out["repetitions"], errors="coerce").fillna(0).astype(int)
+    return out
+
+def with_derived(rows):
+    """Add DERIVED_COLUMNS to prepared rows (only for rows actually sent)"""
+    return rows.assign(
+        content_hash=importer.content_hashes(rows["phrase"], rows["meaning"]),
+        minhash=near_duplicates.signature_blobs(rows["phrase"]),
+        video_id=youtube.video_ids(rows["youtube_url"]),
+    ).assign(
+        video_link=lambda df: youtube.deep_links(df["youtube_url"], df["timestamp"], df["video_id"]),
+    )
+
+def write_rows(dest, user_id, rows):
+    """Worker task: derive the computed columns and write one chunk.
+    Returns how many rows were collapsed into an earlier row with the same content."""
+    rows = with_derived(rows)
+    # Same-content rows (kept apart at the source by a NULL hash, see migrations.py)
+    # would hit the destination's unique (user_id, content_hash) index twice in one
+    # upsert, which Postgres rejects: send the first of each, as prepare_records does
+    unique = rows.drop_duplicates("content_hash")
+    dest.write_chunk(user_id, unique)
+    return len(rows) - len(unique)
+
+def row_digests(rows):
+    """int64 digest of each row's MUTABLE_COLUMNS (stable across runs)"""
+    return pd.util.hash_pandas_object(rows[MUTABLE_COLUMNS], index=False).to_numpy().view("int64")
+
+def sqlite_timestamps(series):
+    """Any timestamp text (e.g. ISO from Postgres) -> SQLite's 'YYYY-MM-DD HH:MM:SS' UTC"""
+    return pd.to_datetime(series, utc=True, format="mixed").dt.strftime(scheduler.TIMESTAMP_FORMAT)
+
+#%%
+class SQLiteEndpoint:
+    """A SQLite database file with the app's schema. As a destination it is created or
+    checked on open (sqlite_backend.initialize); as a source it is only read."""
+
+    SQL_PAGE_FIRST = (
+        f"SELECT id, {', '.join(SYNC_COLUMNS)} FROM phrases "
+        "WHERE user_id = ? ORDER BY created_at, id LIMIT ?"
+    )
+    SQL_PAGE_AFTER = (
+        f"SELECT id, {', '.join(SYNC_COLUMNS)} FROM phrases "
+        "WHERE user_id = ? AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?"
+    )
+    SQL_USER_EXISTS = "SELECT 1 FROM users WHERE id = ?"
+    SQL_UPSERT = (
+        f"INSERT INTO phrases (user_id, {', '.join(SYNC_COLUMNS + DERIVED_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * (1 + len(SYNC_COLUMNS) + len(DERIVED_COLUMNS)))}) "
+        "ON CONFLICT (user_id, content_hash) DO UPDATE SET "
+        + ", ".join(f"{c} = excluded.{c}" for c in MUTABLE_COLUMNS + ["video_id", "video_link"])
+    )
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self.name = f"sqlite:{os.path.abspath(path)}"
+        self._local = threading.local()
+        conn = self.connection()  # open (and check) once, before any worker thread
+        if readonly and not all(m.version in migrations.applied_versions(conn)
+                                for m in migrations.MIGRATIONS):
+            raise SystemExit(f"{path} misses schema migrations: run "
+                             f"`python scripts/migrate_db.py --db {path}` first.")
+
+    def connection(self):
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.readonly:
+                # mode=ro: no schema setup, upgrade or search-index catch-up on the source
+                uri = f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro"
+                try:
+                    conn = sqlite3.connect(uri, uri=True, timeout=60, cached_statements=256)
+                except sqlite3.OperationalError as e:
+                    raise SystemExit(f"Cannot open {self.path} for reading: {e}")
+            else:
+                conn = sqlite3.connect(self.path, timeout=60, cached_statements=256)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                try:
+                    sqlite_backend.initialize(conn)
+                except migrations.SchemaError as e:
+                    raise SystemExit(f"{self.path}: {e}")
+            self._local.conn = conn
+        return conn
+
+    def has_user(self, user_id):
+        return self.connection().execute(self.SQL_USER_EXISTS, (user_id,)).fetchone() is not None
+
+    def read_chunks(self, user_id, cursor, chunk_size):
+        """Yield DataFrames of the user's phrases after cursor, in (created_at, id) order"""
+        conn = self.connection()
+        while True:
+            if cursor is None:
+                rows = conn.execute(self.SQL_PAGE_FIRST, (user_id, chunk_size))
+            else:
+                rows = conn.execute(self.SQL_PAGE_AFTER, (user_id, *cursor, chunk_size))
+            df = pd.DataFrame.from_records(rows.fetchall(), columns=["id", *SYNC_COLUMNS])
+            if df.empty:
+                return
+            yield df
+            if len(df) < chunk_size:
+                return
+            cursor = (df["created_at"].iat[-1], int(df["id"].iat[-1]))
+
+    def write_chunk(self, user_id, rows):
+        """Upsert rows (prepared, with DERIVED_COLUMNS) for user_id; returns the row count"""
+        rows = rows.assign(
+            user_id=user_id,
+            is_learned=rows["is_learned"].astype(int),
+            created_at=sqlite_timestamps(rows["created_at"]),
+            due_at=sqlite_timestamps(rows["due_at"]),
+        )
+        conn = self.connection()
+        with conn:
+            conn.executemany(self.SQL_UPSERT, rows[["user_id", *SYNC_COLUMNS, *DERIVED_COLUMNS]]
+                             .itertuples(index=False, name=None))
+            sqlite_backend.sync_search_index(conn)
+        return len(rows)
+
+class SupabaseEndpoint:
+    """The hosted tables, through the same client as supabase_backend"""
+
+    def __init__(self, url, key):
+        from supabase import create_client  # only needed when a side is hosted
+        self.client = create_client(url, key)
+        self.name = f"supabase:{url}"
+
+    def has_user(self, user_id):
+        return bool(self.client.table("users").select("id").eq("id", user_id).execute().data)
+
+    def read_chunks(self, user_id, cursor, chunk_size):
+        while True:
+            query = self.client.table("phrases").select(f"id, {', '.join(SYNC_COLUMNS)}").eq(
+                "user_id", user_id
+            )
+            if cursor is not None:
+                created_at, last_id = cursor
+                query = query.or_(
+                    f'created_at.gt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.gt.{last_id})'
+                )
+            result = query.order("created_at").order("id").limit(chunk_size).execute()
+            if not result.data:
+                return
+            df = pd.DataFrame(result.data)
+            yield df
+            if len(df) < chunk_size:
+                return
+            cursor = (df["created_at"].iat[-1], int(df["id"].iat[-1]))
+
+    def write_chunk(self, user_id, rows):
+        records = rows[[*SYNC_COLUMNS, *DERIVED_COLUMNS]].assign(
+            user_id=user_id, minhash=rows["minhash"].map(bytes.hex),  # JSON has no bytes
+        ).to_dict("records")
+        self.client.table("phrases").upsert(records, on_conflict="user_id,content_hash").execute()
+        return len(records)
+
+def open_endpoint(spec, secrets_file=SECRETS_FILE, readonly=False):
+    """'supabase' (credentials from SUPABASE_URL/SUPABASE_KEY or the app's secrets.toml),
+    'sqlite:path' or a path ending in .db; readonly for a source"""
+    if spec == "supabase":
+        url, key = os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY")
+        if not (url and key):
+            import tomllib
+            try:
+                with open(secrets_file, "rb") as f:
+                    secrets = tomllib.load(f)["supabase"]
+            except (FileNotFoundError, KeyError):
+                raise SystemExit("Set SUPABASE_URL and SUPABASE_KEY, or pass --secrets "
+                                 "with a [supabase] url/key section.")
+            url, key = secrets["url"], secrets["key"]
+        return SupabaseEndpoint(url, key)
+    if spec.startswith("sqlite:"):
+        return SQLiteEndpoint(spec[len("sqlite:"):], readonly)
+    if spec.endswith(".db"):
+        return SQLiteEndpoint(spec, readonly)
+    raise SystemExit(f"Unknown endpoint: {spec} (use 'supabase', 'sqlite:PATH' or a .db file)")
+
+#%%
+class SyncState:
+    """Checkpoints in a small SQLite file, one row per job (source, dest, user pair):
+    the cursor of the sync in progress, the watermark of the last completed one, and
+    the digest of every row sent (for --incremental)."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sync_jobs (
+        job TEXT PRIMARY KEY,
+        cursor_created_at TEXT,
+        cursor_id INTEGER,
+        watermark_created_at TEXT,
+        watermark_id INTEGER,
+        sent INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS sync_rows (
+        job TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        digest INTEGER NOT NULL,
+        PRIMARY KEY (job, source_id)
+    ) WITHOUT ROWID;
+    """
+    SQL_JOB = (
+        "SELECT cursor_created_at, cursor_id, watermark_created_at, watermark_id, sent "
+        "FROM sync_jobs WHERE job = ?"
+    )
+    SQL_START = "INSERT OR IGNORE INTO sync_jobs (job) VALUES (?)"
+    SQL_ADVANCE = (
+        "UPDATE sync_jobs SET cursor_created_at = ?, cursor_id = ?, sent = sent + ?, "
+        "updated_at = CURRENT_TIMESTAMP WHERE job = ?"
+    )
+    SQL_FINISH = (
+        "UPDATE sync_jobs SET watermark_created_at = COALESCE(cursor_created_at, watermark_created_at), "
+        "watermark_id = COALESCE(cursor_id, watermark_id), cursor_created_at = NULL, cursor_id = NULL, "
+        "updated_at = CURRENT_TIMESTAMP WHERE job = ?"
+    )
+    SQL_DIGESTS = "SELECT source_id, digest FROM sync_rows WHERE job = ?"
+    SQL_SET_DIGEST = "INSERT OR REPLACE INTO sync_rows (job, source_id, digest) VALUES (?, ?, ?)"
+
+    def __init__(self, path, job):
+        self.job = job
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        with self.conn:
+            self.conn.execute(self.SQL_START, (job,))
+        row = self.conn.execute(self.SQL_JOB, (job,)).fetchone()
+        self.cursor = (row[0], row[1]) if row[1] is not None else None
+        self.watermark = (row[2], row[3]) if row[3] is not None else None
+
+    def digests(self):
+        return dict(self.conn.execute(self.SQL_DIGESTS, (self.job,)).fetchall())
+
+    def advance(self, cursor, sent_ids, sent_digests):
+        """Record a chunk as written (one transaction, so cursor and digests agree)"""
+        with self.conn:
+            self.conn.executemany(self.SQL_SET_DIGEST, zip(
+                [self.job] * len(sent_ids), sent_ids, sent_digests
+            ))
+            self.conn.execute(self.SQL_ADVANCE, (*cursor, len(sent_ids), self.job))
+        self.cursor = cursor
+
+    def finish(self):
+        with self.conn:
+            self.conn.execute(self.SQL_FINISH, (self.job,))
+
+    def close(self):
+        self.conn.close()
+
+#%%
+def sync_user(source, dest, source_user, dest_user, state, chunk_size=DEFAULT_CHUNK_SIZE,
+              workers=DEFAULT_WORKERS, incremental=False, new_only=False):
+    """Stream one user's phrases from source to dest.
+    Returns (rows read, rows sent, rows collapsed as duplicates within a chunk)."""
+    known = state.digests() if incremental and not new_only else {}
+    start = state.cursor
+    if start is None and new_only:
+        start = state.watermark
+    if state.cursor is not None:
+        print(f"  Resuming after {state.cursor}")
+
+    read = sent = collapsed = 0
+    started = time.perf_counter()
+    in_flight = deque()  # (future or None, cursor, ids, digests), in source order
+
+    def complete(item):
+        nonlocal sent, collapsed
+        future, cursor, ids, digests = item
+        if future is not None:
+            # a failed chunk stops the sync at the previous checkpoint
+            collapsed += future.result()
+        state.advance(cursor, ids, digests)
+        sent += len(ids)
+        rate = read / max(time.perf_counter() - started, 1e-9)
+        print(f"  read {read}, sent {sent}, collapsed {collapsed} ({rate:.0f} rows/s)")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync") as pool:
+        for chunk in source.read_chunks(source_user, start, chunk_size):
+            read += len(chunk)
+            rows = prepare_rows(chunk)
+            digests = row_digests(rows)
+            if known:
+                changed = [known.get(i) != d for i, d in zip(rows["id"].tolist(), digests.tolist())]
+                rows, digests = rows[changed], digests[changed]
+            cursor = (str(chunk["created_at"].iat[-1]), int(chunk["id"].iat[-1]))
+            future = pool.submit(write_rows, dest, dest_user, rows) if len(rows) else None
+            in_flight.append((future, cursor, rows["id"].tolist(), digests.tolist()))
+            if len(in_flight) >= workers * 2:
+                complete(in_flight.popleft())
+        while in_flight:
+            complete(in_flight.popleft())
+    state.finish()
+    return read, sent, collapsed
+
+def parse_user(value):
+    source, _, dest = value.partition(":")
+    return int(source), int(dest or source)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync phrases between SQLite and Supabase")
+    parser.add_argument("source", help="'supabase', 'sqlite:PATH' or a .db file")
+    parser.add_argument("dest", help="'supabase', 'sqlite:PATH' or a .db file")
+    parser.add_argument("--user", dest="users", type=parse_user, action="append", required=True,
+                        metavar="SRC[:DST]", help="source user_id and destination user_id (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per read and per write")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="concurrent chunk writes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only send rows that are new or changed since the last sync")
+    parser.add_argument("--new-only", action="store_true",
+                        help="with --incremental: only read rows past the last sync's watermark")
+    parser.add_argument("--state", default=STATE_FILE, help="checkpoint file")
+    parser.add_argument("--secrets", default=SECRETS_FILE,
+                        help="secrets.toml with [supabase] url/key (if not in the environment)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    source = open_endpoint(args.source, args.secrets, readonly=True)
+    dest = open_endpoint(args.dest, args.secrets)
+    if source.name == dest.name:
+        raise SystemExit("Source and destination are the same database.")
+    missing = sorted({dest_user for _, dest_user in args.users if not dest.has_user(dest_user)})
+    if missing:
+        raise SystemExit(f"Destination user(s) {', '.join(map(str, missing))} not found in "
+                         f"{dest.name}: create the account(s) there first.")
+    for source_user, dest_user in args.users:
+        job = f"{source.name}#{source_user} -> {dest.name}#{dest_user}"
+        print(f"{job}{' (incremental)' if args.incremental else ''}")
+        state = SyncState(args.state, job)
+        try:
+            read, sent, collapsed = sync_user(
+                source, dest, source_user, dest_user, state, chunk_size=args.chunk_size,
+                workers=max(args.workers, 1), incremental=args.incremental,
+                new_only=args.incremental and args.new_only,
+            )
+        finally:
+            state.close()
+        print(f"✅ user {source_user} -> {dest_user}: read {read}, sent {sent}"
+              f" ({collapsed} duplicates collapsed into an earlier row)")
+
+if __name__ == "__main__":
+    main()